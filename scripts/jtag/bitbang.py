@@ -101,11 +101,11 @@ def write_tms(self, modesel: BitSequence) -> None:
         if self._link_log:
             self._log.debug('write TMS [%d] %s', len(modesel), modesel)
         tck = self._tck
+        tms = self._tms
         tdi = self._tdi
         code = self._bus_code
         stream = bytearray()
-        while modesel:
-            tms = modesel.pop_left_bit()
+        for tms in modesel:
             stream.append(code(tck, tms, tdi))
             tck = not tck
             stream.append(code(tck, tms, tdi))
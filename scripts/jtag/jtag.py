@@ -9,8 +9,10 @@
    Based on JTAG support for FTDI from PyFtdi module
 """
 
+from collections import deque
+from functools import lru_cache
 from logging import getLogger
-from typing import Union
+from typing import Optional, Union
 
 from .bits import BitSequence
 
@@ -26,10 +28,10 @@ class JtagState:
        :param modes: categories to which the state belongs
     """
 
-    def __init__(self, name: str, modes: tuple[str, str]):
+    def __init__(self, name: str, modes: tuple[str, ...]):
         self.name = name
-        self.modes = modes
-        self.exits = [self, self]  # dummy value before initial configuration
+        self.modes = frozenset(modes)
+        self.exits = (self, self)  # dummy value before initial configuration
 
     def __str__(self):
         return self.name
@@ -39,7 +41,7 @@ def __repr__(self):
 
     def setx(self, fstate: 'JtagState', tstate: 'JtagState'):
         """Define the two exit state of a state."""
-        self.exits = [fstate, tstate]
+        self.exits = (fstate, tstate)
 
     def getx(self, event) -> 'JtagState':
         """Retrieve the exit state of the state.
@@ -47,7 +49,7 @@ def getx(self, event) -> 'JtagState':
            :param event: evaluated as a boolean value
            :return: next state
         """
-        return self.exits[int(bool(event))]
+        return self.exits[1 if event else 0]
 
     def is_of(self, mode: str) -> bool:
         """Report if the state is a member of the specified mode."""
@@ -57,26 +59,31 @@ def is_of(self, mode: str) -> bool:
 class JtagStateMachine:
     """Test Access Port controller state machine."""
 
+    TR_WIDTH = 8
+    """Maximum count of events resolved with a single transition lookup."""
+
     def __init__(self):
         self._log = getLogger('jtag.fsm')
-        self.states = {}
-        for state, modes in [('test_logic_reset', ('reset', ' idle')),
+        self.states: dict[str, int] = {}  # state name to state index
+        self._state_list: list[JtagState] = []
+        for state, modes in [('test_logic_reset', ('reset', 'idle')),
                              ('run_test_idle', ('idle',)),
                              ('select_dr_scan', ('dr',)),
                              ('capture_dr', ('dr', 'shift', 'capture')),
                              ('shift_dr', ('dr', 'shift')),
                              ('exit_1_dr', ('dr', 'update', 'pause')),
                              ('pause_dr', ('dr', 'pause')),
-                             ('exit_2_dr', ('dr', 'shift', 'udpate')),
+                             ('exit_2_dr', ('dr', 'shift', 'update')),
                              ('update_dr', ('dr', 'idle')),
                              ('select_ir_scan', ('ir',)),
                              ('capture_ir', ('ir', 'shift', 'capture')),
                              ('shift_ir', ('ir', 'shift')),
-                             ('exit_1_ir', ('ir', 'udpate', 'pause')),
+                             ('exit_1_ir', ('ir', 'update', 'pause')),
                              ('pause_ir', ('ir', 'pause')),
                              ('exit_2_ir', ('ir', 'shift', 'update')),
                              ('update_ir', ('ir', 'idle'))]:
-            self.states[state] = JtagState(state, modes)
+            self.states[state] = len(self._state_list)
+            self._state_list.append(JtagState(state, modes))
         self['test_logic_reset'].setx(self['run_test_idle'],
                                       self['test_logic_reset'])
         self['run_test_idle'].setx(self['run_test_idle'],
@@ -98,27 +105,38 @@ def __init__(self):
         self['pause_ir'].setx(self['pause_ir'], self['exit_2_ir'])
         self['exit_2_ir'].setx(self['shift_ir'], self['update_ir'])
         self['update_ir'].setx(self['run_test_idle'], self['select_dr_scan'])
-        self._current = self['test_logic_reset']
-        self._tr_cache: dict[tuple[str,  # current state name
-                                   int,  # event length
-                                   int],  # event value
-                             JtagState] = {}  # new state
+        by_mode: dict[str, set[int]] = {}
+        for index, state in enumerate(self._state_list):
+            for mode in state.modes:
+                by_mode.setdefault(mode, set()).add(index)
+        self._by_mode: dict[str, frozenset[int]] = \
+            {mode: frozenset(indices) for mode, indices in by_mode.items()}
+        self._exits: list[tuple[int, int]] = \
+            [(self.states[s.exits[0].name], self.states[s.exits[1].name])
+             for s in self._state_list]
+        self._paths = self._build_paths()
+        self._trans = self._build_transitions()
+        self._current_idx = self.states['test_logic_reset']
 
     def __getitem__(self, name: str) -> JtagState:
-        return self.states[name]
+        return self._state_list[self.states[name]]
 
     @property
     def state(self) -> JtagState:
         """Return the current state."""
-        return self._current
+        return self._state_list[self._current_idx]
 
     def state_of(self, mode: str) -> bool:
         """Report if the current state is of the specified mode."""
-        return self._current.is_of(mode)
+        return self._current_idx in self._by_mode.get(mode, ())
+
+    def states_of(self, mode: str) -> frozenset[int]:
+        """Report the indices of the states of the specified mode."""
+        return self._by_mode.get(mode, frozenset())
 
     def reset(self):
         """Reset the state machine."""
-        self._current = self['test_logic_reset']
+        self._current_idx = self.states['test_logic_reset']
 
     def find_path(self, target: Union[JtagState, str],
                   source: Union[JtagState, str, None] = None) \
@@ -135,56 +153,114 @@ def find_path(self, target: Union[JtagState, str],
             source = self[source]
         if isinstance(target, str):
             target = self[target]
+        return list(self._paths[(source.name, target.name)])
+
+    def _build_paths(self) -> dict[tuple[str, str], tuple[JtagState, ...]]:
+        """Compute the shortest paths between any pair of states.
 
-        def next_path(state, target, path):
-            # this test match the target, path is valid
-            if state == target:
-                return path+[state]
-            # candidate paths
-            paths = []
-            for xstate in state.exits:
-                # next state is self (loop around), kill the path
-                if xstate == state:
-                    continue
-                # next state already in upstream (loop back), kill the path
-                if xstate in path:
-                    continue
-                # try the current path
-                npath = next_path(xstate, target, path + [state])
-                # downstream is a valid path, store it
-                if npath:
-                    paths.append(npath)
-            # keep the shortest path
-            return min(((len(path), path) for path in paths),
-                       key=lambda x: x[0])[1] if paths else []
-        return next_path(source, target, [])
+           The state machine is static, so a BFS is run once from each state.
+
+           :return: a map of (source, target) state names to state paths
+        """
+        paths: dict[tuple[str, str], tuple[JtagState, ...]] = {}
+        states = self._state_list
+        for source, sstate in enumerate(states):
+            parents: dict[int, Optional[int]] = {source: None}
+            queue = deque([source])
+            while queue:
+                state = queue.popleft()
+                for xstate in self._exits[state]:
+                    if xstate not in parents:
+                        parents[xstate] = state
+                        queue.append(xstate)
+            for target in parents:
+                path = []
+                state = target
+                while state is not None:
+                    path.append(states[state])
+                    state = parents[state]
+                paths[(sstate.name, states[target].name)] = \
+                    tuple(reversed(path))
+        return paths
+
+    def _build_transitions(self) -> list[list[int]]:
+        """Compute the transition tables for all event sequences up to
+           TR_WIDTH events.
+
+           :return: for each event count, a table of the next state index,
+                    indexed with the current state index and the event value
+        """
+        # each table is derived from the previous one, appending the last
+        # event (LSB) to the sequence of the first length-1 events
+        trans: list[list[int]] = [list(range(len(self._exits)))]
+        for length in range(1, self.TR_WIDTH + 1):
+            prev = trans[-1]
+            table: list[int] = []
+            for state in range(len(self._exits)):
+                for tms in range(1 << length):
+                    xstate = prev[(state << (length - 1)) | (tms >> 1)]
+                    table.append(self._exits[xstate][tms & 1])
+            trans.append(table)
+        return trans
 
     @classmethod
-    def get_events(cls, path):
+    def get_events(cls, path, packed: bool = False) \
+            -> Union[BitSequence, tuple[int, int]]:
         """Build up an event sequence from a state sequence, so that the
            resulting event sequence allows the JTAG state machine to advance
-           from the first state to the last one of the input sequence"""
-        events = []
-        for sstate, dstate in zip(path[:-1], path[1:]):
-            for epos, xstate in enumerate(sstate.exits):
-                if xstate == dstate:
-                    events.append(epos)
-        if len(events) != len(path) - 1:
-            raise JtagError("Invalid path")
-        return BitSequence(events)
+           from the first state to the last one of the input sequence
+
+           :param path: the state sequence
+           :param packed: whether to report the events as a (length, value)
+                          integer pair rather than a BitSequence
+        """
+        events = _get_path_events(tuple(str(s) for s in path))
+        if packed:
+            return len(events), int(events)
+        # the cached sequence is shared, never expose it to the caller
+        return events.copy()
 
     def handle_events(self, events: BitSequence) -> None:
         """State machine stepping.
 
            :param events: a sequence of boolean events to advance the FSM.
         """
-        transit = (self._current.name, len(events), int(events))
-        if transit in self._tr_cache:
-            self._current = self._tr_cache[transit]
-            return
-        for event in events:
-            self._current = self._current.getx(event)
-        self._tr_cache[transit] = self._current
+        self._handle_packed(len(events), int(events))
+
+    def _handle_packed(self, width: int, value: int) -> None:
+        """State machine stepping from a packed event sequence.
+
+           :param width: the count of events
+           :param value: the events, the first event being the MSB
+        """
+        current = self._current_idx
+        while width:
+            length = min(width, self.TR_WIDTH)
+            width -= length
+            tms = (value >> width) & ((1 << length) - 1)
+            current = self._trans[length][(current << length) | tms]
+        self._current_idx = current
+
+
+@lru_cache(maxsize=1)
+def _get_reference_fsm() -> JtagStateMachine:
+    """Return the state machine used to resolve state names."""
+    return JtagStateMachine()
+
+
+@lru_cache(maxsize=4096)
+def _get_path_events(names: tuple[str, ...]) -> BitSequence:
+    """Build up the event sequence from a state name sequence."""
+    fsm = _get_reference_fsm()
+    path = [fsm[name] for name in names]
+    events = []
+    for sstate, dstate in zip(path[:-1], path[1:]):
+        for epos, xstate in enumerate(sstate.exits):
+            if xstate == dstate:
+                events.append(epos)
+    if len(events) != len(path) - 1:
+        raise JtagError("Invalid path")
+    return BitSequence(events)
 
 
 class JtagController:
@@ -209,7 +285,8 @@ def quit(self) -> None:
     def write_tms(self, modesel: BitSequence) -> None:
         """Change the TAP controller state.
 
-           :note: modesel content may be consumed, i.e. emptied
+           :note: modesel content should not be modified, as TMS sequences
+                  may be shared
            :note: last TMS bit should be stored and clocked on next write
                   request
 
@@ -241,9 +318,19 @@ def __init__(self, ctrl: 'JtagController'):
         self._ctrl = ctrl
         self._log = getLogger('jtag.eng')
         self._fsm = JtagStateMachine()
-        self._tr_cache: dict[tuple[str,  # from state
-                                   str],  # to state
-                             BitSequence] = {}  # TMS sequence
+        # transitions indexed by the from state index, then the to state name
+        self._tr_plan: list[dict[str,  # to state
+                                 tuple[BitSequence,  # TMS sequence
+                                       int]]] = []  # new state index
+        for source in self._fsm.states:
+            plan = {}
+            for target, index in self._fsm.states.items():
+                path = self._fsm.find_path(target, source)
+                # the cached sequence is only shared by the engines, which
+                # never alter it
+                events = _get_path_events(tuple(str(s) for s in path))
+                plan[target] = (events, index)
+            self._tr_plan.append(plan)
         self._seq = bytearray()
 
     @property
@@ -267,22 +354,14 @@ def get_available_statenames(self):
 
     def change_state(self, statename) -> None:
         """Advance the TAP controller to the defined state"""
-        transition = (self._fsm.state, statename)
-        if transition not in self._tr_cache:
-            # find the state machine path to move to the new instruction
-            path = self._fsm.find_path(statename)
-            self._log.debug('new path: %s',
-                            ', '.join((str(s).upper() for s in path[1:])))
-            # convert the path into an event sequence
-            events = self._fsm.get_events(path)
-            self._tr_cache[transition] = events
-        else:
-            # transition already in cache
-            events = self._tr_cache[transition]
-        # update the remote device tap controller (write TMS consumes the seq)
-        self._ctrl.write_tms(events.copy())
-        # update the current state machine's state
-        self._fsm.handle_events(events.copy())
+        # pylint: disable=protected-access
+        fsm = self._fsm
+        events, index = self._tr_plan[fsm._current_idx][statename]
+        # update the remote device tap controller
+        self._ctrl.write_tms(events)
+        # update the current state machine's state, the destination state is
+        # known ahead, there is no need to replay the events
+        fsm._current_idx = index
 
     def go_idle(self) -> None:
         """Change the current TAP controller to the IDLE state"""
@@ -10,29 +10,48 @@
 
 from argparse import ArgumentParser, FileType, Namespace
 from atexit import register
-from collections import defaultdict, deque
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
 from csv import reader as csv_reader, writer as csv_writer
-from fnmatch import fnmatchcase
+from fnmatch import fnmatchcase, translate
 from glob import glob
+from itertools import chain, count as itercount
 try:
     # try to use HJSON if available
-    from hjson import load as jload
+    from hjson import loads as hjloads
 except ImportError:
-    # fallback on legacy JSON syntax otherwise
-    from json import load as jload
-from os import close, curdir, environ, getcwd, linesep, pardir, sep, unlink
+    # only accept legacy JSON syntax otherwise
+    hjloads = None
+try:
+    # use a native JSON parser if available
+    from orjson import loads as jloads
+except ImportError:
+    from json import loads as jloads
+from os import (close, curdir, environ, getcwd, killpg, linesep, listdir,
+                pardir, read as os_read, scandir, sep, set_blocking, stat,
+                unlink)
+try:
+    # CPU affinity is not supported on all hosts
+    from os import sched_getaffinity, sched_setaffinity
+except ImportError:
+    sched_getaffinity = sched_setaffinity = None
 from os.path import (abspath, basename, dirname, exists, isabs, isdir, isfile,
-                     join as joinpath, normpath, relpath)
-from select import POLLIN, POLLERR, POLLHUP, poll as spoll
-from shutil import rmtree
+                     join as joinpath, normpath, relpath, split)
+from queue import SimpleQueue
+from selectors import DefaultSelector, EVENT_READ
+from shlex import split as shsplit
+from shutil import rmtree, which
+from signal import SIGKILL, SIGTERM
 from socket import socket, timeout as LegacyTimeoutError
 from subprocess import Popen, PIPE, TimeoutExpired
 from sys import argv, exit as sysexit, modules, stderr
-from threading import Event, Thread
+from threading import Event, Lock, Thread, Timer
 from tempfile import mkdtemp, mkstemp
 from time import time as now
 from traceback import format_exc
-from typing import Any, Iterator, NamedTuple, Optional
+from typing import (Any, Callable, Iterable, Iterator, NamedTuple, Optional,
+                    TextIO, Union)
 
 import logging
 import re
@@ -49,6 +68,41 @@
 getLogger = logging.getLogger
 
 
+def pop_lines(buf: bytearray) -> list[bytes]:
+    """Extract all complete lines from a reception buffer.
+
+       Consumed bytes are removed in place, only the trailing incomplete
+       line, if any, is kept in the buffer.
+
+       :param buf: the reception buffer
+       :return: the list of complete lines, w/o their EOL marker
+    """
+    lines = []
+    start = 0
+    while True:
+        eol = buf.find(b'\n', start)
+        if eol < 0:
+            break
+        lines.append(bytes(buf[start:eol]))
+        start = eol + 1
+    if start:
+        del buf[:start]
+    return lines
+
+
+def signal_process_group(proc: Popen, sig: int) -> None:
+    """Send a signal to a process and all the processes it has spawned.
+
+       :param proc: the process, which should lead its own process group
+       :param sig: the signal to send
+    """
+    try:
+        killpg(proc.pid, sig)
+    except ProcessLookupError:
+        # no process left in the group
+        pass
+
+
 class ExecTime(float):
     """Float with hardcoded formatter.
     """
@@ -67,21 +121,97 @@ class TestResult(NamedTuple):
     error: str
 
 
+class ResultWriter:
+    """CSV result file writer that batches flushes to the file.
+
+       Rows are committed once several rows are pending, or at the latest
+       some time after the first pending row has been written, so that a
+       client live-tracking progress on long test runs still sees results
+       in a timely manner, even if the next test takes a while to complete.
+
+       :param cfp: the output CSV file
+    """
+
+    FLUSH_ROWS = 16
+    """Count of pending rows that triggers a commit."""
+
+    FLUSH_DELAY = 2.0
+    """Delay in seconds after which pending rows are committed."""
+
+    def __init__(self, cfp):
+        self._cfp = cfp
+        self._csv = csv_writer(cfp)
+        self._pending = 0
+        self._lock = Lock()
+        self._timer: Optional[Timer] = None
+
+    def writerow(self, row: Iterable[Any]) -> None:
+        """Write a result row.
+
+           :param row: the row to write
+        """
+        with self._lock:
+            self._csv.writerow(row)
+            self._pending += 1
+            if self._pending < self.FLUSH_ROWS:
+                if not self._timer:
+                    self._timer = Timer(self.FLUSH_DELAY, self.flush)
+                    self._timer.daemon = True
+                    self._timer.start()
+                return
+        self.flush()
+
+    def flush(self) -> None:
+        """Commit pending rows to the file."""
+        with self._lock:
+            if self._timer:
+                self._timer.cancel()
+                self._timer = None
+            if self._pending:
+                self._cfp.flush()
+                self._pending = 0
+
+    def close(self) -> None:
+        """Commit all pending rows, the file itself is left open."""
+        self.flush()
+
+
 class ResultFormatter:
     """Format a result CSV file as a simple result table."""
 
+    READ_BUFFER_SIZE = 1 << 20
+    """Buffer size to read CSV files with, to limit read calls on large
+       result files.
+    """
+
     def __init__(self):
         self._results = []
+        self._widths: list[int] = []
 
-    def load(self, csvpath: str) -> None:
+    def load(self, csvpath: Union[str, TextIO]) -> None:
         """Load a CSV file (generated with QEMUExecuter) and parse it.
 
-           :param csvpath: the path to the CSV file.
+           :param csvpath: the path to the CSV file, or the CSV file stream
+                           to read from its current position
         """
-        with open(csvpath, 'rt', encoding='utf-8') as cfp:
+        if isinstance(csvpath, str):
+            # pylint: disable=consider-using-with
+            csvfile = open(csvpath, 'rt', encoding='utf-8', newline='',
+                           buffering=self.READ_BUFFER_SIZE)
+        else:
+            csvfile = nullcontext(csvpath)
+        with csvfile as cfp:
             csv = csv_reader(cfp)
+            widths = self._widths
             for row in csv:
                 self._results.append(row)
+                # track column widths while parsing, rather than walking the
+                # whole table once more before showing it
+                if len(row) > len(widths):
+                    widths.extend([0] * (len(row) - len(widths)))
+                for pos, cell in enumerate(row):
+                    if len(cell) > widths[pos]:
+                        widths[pos] = len(cell)
 
     def show(self, spacing: bool = False) -> None:
         """Print a simple formatted ASCII table with loaded CSV results.
@@ -90,23 +220,30 @@ def show(self, spacing: bool = False) -> None:
         """
         if spacing:
             print('')
-        widths = [max(len(x) for x in col) for col in zip(*self._results)]
-        self._show_line(widths, '-')
-        self._show_row(widths, self._results[0])
-        self._show_line(widths, '=')
+        widths = self._widths
+        # build the table layout once, only fill it in for each row
+        row_fmt = self._row_format(widths)
+        sep_line = self._line(widths, '-')
+        # pad incomplete rows, if any
+        fill = [''] * len(widths)
+        print(sep_line)
+        print(row_fmt.format(*self._results[0], *fill))
+        print(self._line(widths, '='))
         for row in self._results[1:]:
-            self._show_row(widths, row)
-            self._show_line(widths, '-')
+            print(row_fmt.format(*row, *fill))
+            print(sep_line)
         if spacing:
             print('')
 
-    def _show_line(self, widths: list[int], csep: str) -> None:
-        print(f'+{"+".join([csep * (w+2) for w in widths])}+')
+    @staticmethod
+    def _line(widths: list[int], csep: str) -> str:
+        return f'+{"+".join(csep * (w+2) for w in widths)}+'
 
-    def _show_row(self, widths: list[int], cols: list[str]) -> None:
-        line = '|'.join([f' {c:{">" if p else "<"}{w}s} '
-                         for p, (w, c) in enumerate(zip(widths, cols))])
-        print(f'|{line}|')
+    @staticmethod
+    def _row_format(widths: list[int]) -> str:
+        cols = '|'.join(f' {{:{">" if p else "<"}{w}s}} '
+                        for p, w in enumerate(widths))
+        return f'|{cols}|'
 
 
 class LogMessageClassifier:
@@ -120,9 +257,13 @@ class LogMessageClassifier:
     def __init__(self, classifiers: Optional[dict[str, list[str]]] = None,
                  qemux: Optional[str] = None):
         self._qemux = qemux
+        self._bqemux = qemux.encode() if qemux else None
         if classifiers is None:
             classifiers = {}
-        self._regexes: dict[int, re.Pattern] = {}
+        # log levels are listed by decreasing priority
+        self._levels: dict[str, int] = {}
+        alternatives: list[str] = []
+        custom = False
         for klv in 'error warning info debug'.split():
             uklv = klv.upper()
             cstrs = classifiers.get(klv, [])
@@ -137,37 +278,58 @@ def __init__(self, classifiers: Optional[dict[str, list[str]]] = None,
                     raise ValueError(f"Invalid log classifier '{cstr}' for "
                                      f"{klv}: {exc}") from exc
                 regexes.append(cstr)
-            if regexes:
-                lvl = getattr(logging, uklv)
-                self._regexes[lvl] = re.compile(f"({'|'.join(regexes)})")
-            else:
-                lvl = getattr(logging, 'NOTSET')
-                # never match RE
-                self._regexes[lvl] = re.compile(r'\A(?!x)x')
-
-    def classify(self, line: str, default: int = logging.ERROR) -> int:
+                custom = True
+            self._levels[klv] = getattr(logging, uklv)
+            alternatives.append(f"(?P<{klv}>{'|'.join(regexes)})")
+        # use a single look-ahead expression, so that the line is scanned only
+        # once and overlapping matches of any level are reported
+        pattern = f"(?=(?:{'|'.join(alternatives)}))"
+        self._regex = re.compile(pattern)
+        # bytes flavour, to classify raw lines without decoding them first.
+        # Only built-in patterns are ASCII-safe: custom patterns may rely on
+        # Unicode escapes or classes, so lines are decoded to match them.
+        self._bregex = None if custom else re.compile(pattern.encode())
+        self._top_level = max(self._levels.values())
+
+    def classify(self, line: Union[str, bytes],
+                 default: int = logging.ERROR) -> int:
         """Classify log level of a line depending on its content.
 
-           :param line: line to classify
+           :param line: line to classify, either as a string or raw bytes
            :param default: defaut log level in no classification is found
            :return: the logger log level to use
         """
-        if self._qemux and line.startswith(self._qemux):
+        if isinstance(line, bytes) and not self._bregex:
+            line = line.decode('utf-8', errors='ignore')
+        if isinstance(line, bytes):
+            regex, qemux, waiting = self._bregex, self._bqemux, b'QEMU waiting'
+        else:
+            regex, qemux, waiting = self._regex, self._qemux, 'QEMU waiting'
+        if qemux and line.startswith(qemux):
             # discard QEMU internal messages that cannot be disable from the VM
-            if line.find("QEMU waiting") > 0:
+            if line.find(waiting) > 0:
                 return logging.NOTSET
-        for lvl, pattern in self._regexes.items():
-            if pattern.search(line):
-                return lvl
-        return default
+        level = None
+        for mo in regex.finditer(line):
+            lvl = self._levels[mo.lastgroup]
+            if level is None or lvl > level:
+                if lvl == self._top_level:
+                    return lvl
+                level = lvl
+        return default if level is None else level
 
 
 class QEMUWrapper:
     """A small engine to run tests with QEMU.
 
-       :param tcpdev: a host, port pair that defines how to access the TCP
-                      Virtual Com Port of QEMU first UART
+       The engine does not keep any per-execution state, so several QEMU
+       instances may be run concurrently, provided each one uses its own
+       virtual communication ports.
+
+       :param log_classifiers: a map of loglevel, list of RE-compatible
+                               strings to classify guest messages
        :param debug: whether running in debug mode
+       :param stop: an optional event to abort any running execution
     """
     # pylint: disable=too-few-public-methods
 
@@ -181,19 +343,45 @@ class QEMUWrapper:
        such as SIGABRT.
     """
 
+    EXIT_CRE = re.compile(EXIT_ON)
+    """Compiled matcher for the exit strings."""
+
+    EXIT_ALT_CRE = re.compile(rb'^.*\((.*?)\).*$')
+    """Extract the alternative exit strings from an exit matcher."""
+
     ANSI_CRE = re.compile(rb'(\x9B|\x1B\[)[0-?]*[ -\/]*[@-~]')
     """ANSI escape sequences."""
 
+    VCP_NAME_CRE = re.compile(r'^.*[-\.+]')
+    """Prefix to strip from a VCP identifier to build up its log name."""
+
+    LOG_LOCATION_CRE = re.compile(r'^.*:\d+]')
+    """Source location prefix to strip from guest error messages."""
+
     GUEST_ERROR_OFFSET = 40
     """Offset for guest errors. Should be larger than the host max signal value.
     """
 
+    EXIT_CODES = dict(zip(EXIT_ALT_CRE.sub(rb'\1', EXIT_ON).split(b'|'),
+                          chain((0,), itercount(GUEST_ERROR_OFFSET + 1))))
+    """Return codes of the alternative exit strings, the first alternative
+       being the success code.
+    """
+
     NO_MATCH_RETURN_CODE = 100
     """Return code when no matching string is found in guest output."""
 
-    def __init__(self, log_classifiers: dict[str, list[str]], debug: bool):
+    SELECT_TIMEOUT = 0.2
+    """Maximum time to wait for QEMU or guest output, before checking the
+       QEMU process and the context workers for completion.
+    """
+
+    def __init__(self, log_classifiers: dict[str, list[str]], debug: bool,
+                 stop: Optional[Event] = None):
         self._log_classifiers = log_classifiers
         self._debug = debug
+        self._stop = stop or Event()
+        self._taskset = which('taskset')
         self._log = getLogger('pyot')
         self._qlog = getLogger('pyot.qemu')
 
@@ -218,12 +406,12 @@ def run(self, tdef: EasyDict[str, Any]) -> tuple[int, ExecTime, str]:
                            defined as a regular expression.
                 - start_delay, the delay to wait before starting the execution
                            of the context once QEMU command has been started.
+                - cpus, an optional set of host CPUs QEMU should be pinned to
            :return: a 3-uple of exit code, execution time, and last guest error
         """
         # stdout and stderr belongs to QEMU VM
         # OT's UART0 is redirected to a TCP stream that can be accessed through
         # self._device. The VM pauses till the TCP socket is connected
-        xre = re.compile(self.EXIT_ON)
         if tdef.trigger:
             sync_event = Event()
             if tdef.trigger.startswith("r'") and tdef.trigger.endswith("'"):
@@ -250,13 +438,32 @@ def trig_match(bline):
         last_error = ''
         vcp_map = tdef.vcp_map
         vcp_ctxs: dict[int, tuple[str, socket, bytearray]] = {}
+        log_ctxs: dict[int, tuple[bool, bytearray]] = {}
+        selector = DefaultSelector()
+        # reception buffer shared by all VCPs, reused for each read
+        rx_buf = memoryview(bytearray(4096))
+        qemu_exec = f'{basename(tdef.command[0])}: '
+        classifier = LogMessageClassifier(classifiers=self._log_classifiers,
+                                          qemux=qemu_exec)
+        drain = None
+        drain_stop = Event()
         try:
             workdir = dirname(tdef.command[0])
             log.debug('Executing QEMU as %s', ' '.join(tdef.command))
+            # run QEMU in its own process group, so that any process it spawns
+            # can be terminated along with it
+            command = tdef.command
+            cpus = tdef.get('cpus')
+            if cpus and self._taskset:
+                # pin QEMU before it is executed, so that all QEMU threads
+                # inherit the CPU affinity
+                command = [self._taskset, '-c',
+                           ','.join(map(str, sorted(cpus))), *command]
             # pylint: disable=consider-using-with
-            proc = Popen(tdef.command, bufsize=1, cwd=workdir, stdout=PIPE,
-                         stderr=PIPE, encoding='utf-8', errors='ignore',
-                         text=True)
+            proc = Popen(command, bufsize=-1, cwd=workdir, stdout=PIPE,
+                         stderr=PIPE, start_new_session=True)
+            if cpus and not self._taskset:
+                self._pin_process(proc.pid, cpus)
             try:
                 proc.wait(0.1)
             except TimeoutExpired:
@@ -266,19 +473,20 @@ def trig_match(bline):
                 log.error('QEMU bailed out: %d for "%s"', ret, tdef.test_name)
                 raise OSError()
             log.debug('Execute QEMU for %.0f secs', tdef.timeout)
-            # unfortunately, subprocess's stdout calls are blocking, so the
-            # only way to get near real-time output from QEMU is to use a
-            # dedicated thread that may block whenever no output is available
-            # from the VM. This thread reads and pushes back lines to a local
-            # queue, which is popped and logged to the local logger on each
-            # loop. Note that Popen's communicate() also relies on threads to
-            # perform stdout/stderr read out.
-            log_q = deque()
-            Thread(target=self._qemu_logger, name='qemu_out_logger',
-                   args=(proc, log_q, True), daemon=True).start()
-            Thread(target=self._qemu_logger, name='qemu_err_logger',
-                   args=(proc, log_q, False), daemon=True).start()
-            poller = spoll()
+            # QEMU stdout/stderr and VCP sockets are all monitored from a
+            # single selector, so that output is handled as soon as it is
+            # available, without any helper thread nor polling loop.
+            for err, stream in ((False, proc.stdout), (True, proc.stderr)):
+                set_blocking(stream.fileno(), False)
+                log_ctxs[stream.fileno()] = (err, bytearray())
+                selector.register(stream, EVENT_READ)
+            # the selector is only used once the VCPs are connected and the
+            # context has been started, QEMU output should be read meanwhile
+            # so that QEMU never stalls on a full pipe
+            drain = Thread(target=self._drain_qemu_logs,
+                           args=(log_ctxs, classifier, drain_stop),
+                           daemon=True)
+            drain.start()
             connect_map = vcp_map.copy()
             timeout = now() + tdef.start_delay
             # ensure that QEMU starts and give some time for it to set up
@@ -287,6 +495,8 @@ def trig_match(bline):
             vcp_lognames = []
             vcplogname = 'pyot.vcp'
             while connect_map:
+                if self._stop.is_set():
+                    raise InterruptedError('QEMU execution interrupted')
                 if now() > timeout:
                     minfo = ', '.join(f'{d} @ {r[0]}:{r[1]}'
                                       for d, r in connect_map.items())
@@ -299,14 +509,17 @@ def trig_match(bline):
                         sock.settimeout(1)
                         sock.connect((host, port))
                         connected.append(vcpid)
-                        vcp_name = re.sub(r'^.*[-\.+]', '', vcpid)
+                        vcp_name = self.VCP_NAME_CRE.sub('', vcpid)
                         vcp_lognames.append(vcp_name)
                         vcp_log = getLogger(f'{vcplogname}.{vcp_name}')
+                        # log level is not expected to change while QEMU
+                        # executes, do not query it for each received line
+                        vcp_debug = vcp_log.isEnabledFor(logging.DEBUG)
                         vcp_ctxs[sock.fileno()] = [vcpid, sock, bytearray(),
-                                                   vcp_log]
-                        # remove timeout for VCP comm, as poll is used
+                                                   vcp_log, vcp_debug]
+                        # remove timeout for VCP comm, as select is used
                         sock.settimeout(None)
-                        poller.register(sock, POLLIN | POLLERR | POLLHUP)
+                        selector.register(sock, EVENT_READ)
                     except ConnectionRefusedError:
                         continue
                     except OSError as exc:
@@ -331,23 +544,13 @@ def trig_match(bline):
                     ret = 126
                     last_error = str(exc)
                     raise
-            qemu_exec = f'{basename(tdef.command[0])}: '
-            classifier = LogMessageClassifier(classifiers=self._log_classifiers,
-                                              qemux=qemu_exec)
+            drain_stop.set()
+            drain.join()
+            drain = None
             abstimeout = float(tdef.timeout) + now()
-            qemu_default_log = logging.ERROR
-            vcp_default_log = logging.DEBUG
             while now() < abstimeout:
-                while log_q:
-                    err, qline = log_q.popleft()
-                    if err:
-                        level = classifier.classify(qline, qemu_default_log)
-                        if level == logging.INFO and \
-                           qline.find('QEMU waiting for connection') >= 0:
-                            level = logging.DEBUG
-                    else:
-                        level = logging.INFO
-                    self._qlog.log(level, qline)
+                if self._stop.is_set():
+                    raise InterruptedError('QEMU execution interrupted')
                 if tdef.context:
                     wret = tdef.context.check_error()
                     if wret:
@@ -367,53 +570,46 @@ def trig_match(bline):
                         logfn('Abnormal QEMU termination: %d for "%s"',
                               ret, tdef.test_name)
                     break
-                for vfd, event in poller.poll(0.01):
-                    if event in (POLLERR, POLLHUP):
-                        poller.modify(vfd, 0)
+                timeout = min(self.SELECT_TIMEOUT, abstimeout - now())
+                for key, _ in selector.select(timeout):
+                    vfd = key.fd
+                    if vfd in log_ctxs:
+                        if not self._read_qemu_log(vfd, log_ctxs, classifier):
+                            # QEMU has closed its output stream
+                            selector.unregister(key.fileobj)
                         continue
-                    vcpid, vcp, vcp_buf, vcp_log = vcp_ctxs[vfd]
+                    vcpid, vcp, vcp_buf, vcp_log, vcp_debug = vcp_ctxs[vfd]
                     try:
-                        data = vcp.recv(4096)
+                        rx_len = vcp.recv_into(rx_buf)
                     except (TimeoutError, LegacyTimeoutError):
-                        log.error('Unexpected timeout w/ poll on %s', vcp)
+                        log.error('Unexpected timeout w/ select on %s', vcp)
                         continue
-                    vcp_buf += data
-                    if not vcp_buf:
+                    if not rx_len:
+                        # QEMU has closed the VCP connection
+                        selector.unregister(vcp)
                         continue
-                    lines = vcp_buf.split(b'\n')
-                    vcp_buf[:] = bytearray(lines[-1])
-                    for line in lines[:-1]:
-                        line = self.ANSI_CRE.sub(b'', line)
-                        if trig_match and trig_match(line):
-                            # reset timeout from this event
-                            abstimeout = float(tdef.timeout) + now()
-                            log.info('Trigger pattern detected, resuming for '
-                                     '%.0f secs', tdef.timeout)
-                            sync_event.set()
-                            trig_match = None
-                        xmo = xre.search(line)
-                        if xmo:
-                            xend = now()
-                            exit_word = xmo.group(1).decode('utf-8',
-                                                            errors='ignore')
-                            ret = self._get_exit_code(xmo)
-                            log.info("Exit sequence detected: '%s' -> %d",
-                                     exit_word, ret)
-                            if ret == 0:
-                                last_error = ''
-                            break
-                        sline = line.decode('utf-8', errors='ignore').rstrip()
-                        level = classifier.classify(sline, vcp_default_log)
-                        if level == logging.ERROR:
-                            err = re.sub(r'^.*:\d+]', '', sline).lstrip()
-                            # be sure not to preserve comma as this char is
-                            # used as a CSV separator.
-                            last_error = err.strip('"').replace(',', ';')
-                        vcp_log.log(level, sline)
-                    else:
-                        # no match for exit sequence on current VCP
-                        continue
-                    if ret is not None:
+                    vcp_buf += rx_buf[:rx_len]
+                    xmo, triggered, error = self._process_vcp_lines(
+                        pop_lines(vcp_buf), classifier, vcp_log,
+                        vcp_debug, trig_match)
+                    if error is not None:
+                        last_error = error
+                    if triggered:
+                        # reset timeout from this event
+                        abstimeout = float(tdef.timeout) + now()
+                        log.info('Trigger pattern detected, resuming for '
+                                 '%.0f secs', tdef.timeout)
+                        sync_event.set()
+                        trig_match = None
+                    if xmo:
+                        xend = now()
+                        exit_word = xmo.group(1).decode('utf-8',
+                                                        errors='ignore')
+                        ret = self._get_exit_code(xmo)
+                        log.info("Exit sequence detected: '%s' -> %d",
+                                 exit_word, ret)
+                        if ret == 0:
+                            last_error = ''
                         # match for exit sequence on current VCP
                         break
                 if ret is not None:
@@ -427,28 +623,37 @@ def trig_match(bline):
                 log.error('Unable to execute QEMU: %s', exc)
                 ret = proc.returncode if proc.poll() is not None else 125
         finally:
+            if drain:
+                drain_stop.set()
+                drain.join()
             if xend is None:
                 xend = now()
-            for _, sock, _, _ in vcp_ctxs.values():
+            selector.close()
+            for _, sock, _, _, _ in vcp_ctxs.values():
                 sock.close()
             vcp_ctxs.clear()
             if proc:
                 if xend is None:
                     xend = now()
-                proc.terminate()
+                signal_process_group(proc, SIGTERM)
                 try:
                     # leave 1 second for QEMU to cleanly complete...
                     proc.wait(1.0)
                 except TimeoutExpired:
                     # otherwise kill it
                     log.error('Force-killing QEMU')
-                    proc.kill()
+                    signal_process_group(proc, SIGKILL)
                 if ret is None:
                     ret = proc.returncode
-                # retrieve the remaining log messages
+                # retrieve the remaining log messages, including any
+                # incomplete line already read from QEMU
+                partials = {err: bytes(buf) for err, buf in log_ctxs.values()}
                 stdlog = self._qlog.info if ret else self._qlog.debug
-                for msg, logger in zip(proc.communicate(timeout=0.1),
-                                       (stdlog, self._qlog.error)):
+                for err, msg, logger in zip((False, True),
+                                            proc.communicate(timeout=0.1),
+                                            (stdlog, self._qlog.error)):
+                    msg = b''.join((partials.get(err, b''), msg or b''))
+                    msg = msg.decode('utf-8', errors='ignore')
                     for line in msg.split('\n'):
                         line = line.strip()
                         if line:
@@ -456,6 +661,27 @@ def trig_match(bline):
         xtime = ExecTime(xend-xstart) if xstart and xend else 0.0
         return abs(ret) or 0, xtime, last_error
 
+    def _pin_process(self, pid: int, cpus: set[int]) -> None:
+        """Pin a running process and all its threads to a set of CPUs.
+
+           :param pid: the process to pin
+           :param cpus: the host CPUs to pin the process to
+        """
+        try:
+            tids = [int(tid) for tid in listdir(f'/proc/{pid}/task')]
+        except OSError:
+            tids = [pid]
+        for tid in tids:
+            try:
+                sched_setaffinity(tid, cpus)
+            except ProcessLookupError:
+                # thread has already completed
+                continue
+            except OSError as exc:
+                self._log.warning('Cannot pin QEMU to CPUs %s: %s',
+                                  ','.join(map(str, sorted(cpus))), exc)
+                return
+
     @classmethod
     def classify_log(cls, line: str, default: int = logging.ERROR,
                      qemux: Optional[str] = None) -> int:
@@ -496,13 +722,100 @@ def _colorize_vcp_log(self, vcplogname: str, lognames: list[str]) -> None:
         for color, logname in enumerate(sorted(lognames)):
             clr_fmt.add_logger_colors(f'{vcplogname}.{logname}', color)
 
-    def _qemu_logger(self, proc: Popen, queue: deque, err: bool):
-        # worker thread, blocking on VM stdout/stderr
-        stream = proc.stderr if err else proc.stdout
-        while proc.poll() is None:
-            line = stream.readline().strip()
-            if line:
-                queue.append((err, line))
+    def _process_vcp_lines(self, lines: list[bytes],
+                           classifier: LogMessageClassifier,
+                           vcp_log: logging.Logger, vcp_debug: bool,
+                           trig_match: Optional[Callable[[bytes], Any]]) \
+            -> tuple[Optional[re.Match], bool, Optional[str]]:
+        """Handle the lines received from a virtual communication port.
+
+           Line processing stops as soon as the exit sequence is detected.
+
+           :param lines: the received lines
+           :param classifier: the log level classifier for guest messages
+           :param vcp_log: the logger of the virtual communication port
+           :param vcp_debug: whether debug messages are emitted by vcp_log
+           :param trig_match: the trigger pattern matcher, if any
+           :return: a 3-uple of the exit sequence match if any, whether the
+                    trigger pattern has been detected, and the last guest
+                    error if any
+        """
+        triggered = False
+        last_error = None
+        for line in lines:
+            line = self.ANSI_CRE.sub(b'', line)
+            if trig_match and not triggered and trig_match(line):
+                triggered = True
+            xmo = self.EXIT_CRE.search(line)
+            if xmo:
+                return xmo, triggered, last_error
+            line = line.rstrip()
+            level = classifier.classify(line, logging.DEBUG)
+            if level == logging.ERROR:
+                sline = line.decode('utf-8', errors='ignore')
+                err = self.LOG_LOCATION_CRE.sub('', sline).lstrip()
+                # be sure not to preserve comma as this char is used as a CSV
+                # separator.
+                last_error = err.strip('"').replace(',', ';')
+            elif level <= logging.DEBUG and not vcp_debug:
+                # only decode lines that may be emitted
+                continue
+            else:
+                sline = line.decode('utf-8', errors='ignore')
+            vcp_log.log(level, sline)
+        return None, triggered, last_error
+
+    def _drain_qemu_logs(self, log_ctxs: dict[int, tuple[bool, bytearray]],
+                         classifier: LogMessageClassifier, stop: Event) -> None:
+        """Log QEMU output streams until requested to stop.
+
+           :param log_ctxs: the reception contexts of the output streams
+           :param classifier: the log message classifier
+           :param stop: the event to stop logging
+        """
+        with DefaultSelector() as selector:
+            for lfd in log_ctxs:
+                selector.register(lfd, EVENT_READ)
+            while selector.get_map() and not stop.is_set():
+                for key, _ in selector.select(self.SELECT_TIMEOUT):
+                    if not self._read_qemu_log(key.fd, log_ctxs, classifier):
+                        selector.unregister(key.fd)
+
+    def _read_qemu_log(self, lfd: int,
+                       log_ctxs: dict[int, tuple[bool, bytearray]],
+                       classifier: LogMessageClassifier) -> bool:
+        """Read and log available output from a QEMU output stream.
+
+           :param lfd: the file descriptor of the output stream
+           :param log_ctxs: the reception contexts of the output streams
+           :param classifier: the log message classifier
+           :return: False once the stream has been closed
+        """
+        err, log_buf = log_ctxs[lfd]
+        try:
+            data = os_read(lfd, 65536)
+        except BlockingIOError:
+            return True
+        if not data:
+            return False
+        log_buf += data
+        self._log_qemu_lines(classifier, err, pop_lines(log_buf))
+        return True
+
+    def _log_qemu_lines(self, classifier: LogMessageClassifier, err: bool,
+                        lines: list[bytes]) -> None:
+        for line in lines:
+            qline = line.decode('utf-8', errors='ignore').strip()
+            if not qline:
+                continue
+            if err:
+                level = classifier.classify(qline, logging.ERROR)
+                if level == logging.INFO and \
+                   qline.find('QEMU waiting for connection') >= 0:
+                    level = logging.DEBUG
+            else:
+                level = logging.INFO
+            self._qlog.log(level, qline)
 
     def _get_exit_code(self, xmo: re.Match) -> int:
         groups = xmo.groups()
@@ -510,25 +823,17 @@ def _get_exit_code(self, xmo: re.Match) -> int:
             self._log.debug('No matching group, using defaut code')
             return self.NO_MATCH_RETURN_CODE
         match = groups[0]
+        code = self.EXIT_CODES.get(match)
+        if code is not None:
+            return code
         try:
             # try to match an integer value
             return int(match)
         except ValueError:
             pass
-        # try to find in the regular expression whether the match is one of
-        # the alternative in the first group
-        alts = re.sub(rb'^.*\((.*?)\).*$', r'\1', xmo.re.pattern).split(b'|')
-        try:
-            pos = alts.index(match)
-            if pos:
-                pos += self.GUEST_ERROR_OFFSET
-            return pos
-        except ValueError as exc:
-            self._log.error('Invalid match: %s with %s', exc, alts)
-            return len(alts)
-        # any other case
-        self._log.debug('No match, using defaut code')
-        return self.NO_MATCH_RETURN_CODE
+        self._log.error('Invalid match: %s with %s', match,
+                        list(self.EXIT_CODES))
+        return len(self.EXIT_CODES)
 
 
 class QEMUFileManager:
@@ -539,11 +844,18 @@ class QEMUFileManager:
 
     DEFAULT_OTP_ECC_BITS = 6
 
+    VAR_CRE = re.compile(r'\$\{(\w+)\}')
+    """Variable placeholder."""
+
+    DIR_CRE = re.compile(r'\@\{(\w*)\}/')
+    """Temporary directory placeholder."""
+
     def __init__(self, keep_temp: bool = False):
         self._log = getLogger('pyot.file')
         self._keep_temp = keep_temp
         self._in_fly: set[str] = set()
-        self._otp_files: dict[str, tuple[str, int]] = {}
+        self._otp_files: dict[tuple[int, int, int], tuple[str, int]] = {}
+        self._otp_by_raw: dict[str, tuple[int, int, int]] = {}
         self._env: dict[str, str] = {}
         self._transient_vars: set[str] = set()
         self._dirs: dict[str, str] = {}
@@ -587,13 +899,10 @@ def interpolate(self, value: Any) -> str:
            :param value: input value
            :return: interpolated value as a string
         """
-        def replace(smo: re.Match) -> str:
-            name = smo.group(1)
-            val = self._env[name] if name in self._env \
-                else environ.get(name, '')
-            return val
         svalue = str(value)
-        nvalue = re.sub(r'\$\{(\w+)\}', replace, svalue)
+        if '${' not in svalue:
+            return svalue
+        nvalue = self.VAR_CRE.sub(self._resolve_var, svalue)
         if nvalue != svalue:
             self._log.debug('Interpolate %s with %s', value, nvalue)
         return nvalue
@@ -605,14 +914,10 @@ def define(self, aliases: dict[str, Any]) -> None:
 
            :param aliases: an alias JSON (sub-)tree
         """
-        def replace(smo: re.Match) -> str:
-            name = smo.group(1)
-            val = self._env[name] if name in self._env \
-                else environ.get(name, '')
-            return val
         for name in aliases:
             value = str(aliases[name])
-            value = re.sub(r'\$\{(\w+)\}', replace, value)
+            if '${' in value:
+                value = self.VAR_CRE.sub(self._resolve_var, value)
             if exists(value):
                 value = normpath(value)
             aliases[name] = value
@@ -647,6 +952,9 @@ def interpolate_dirs(self, value: str, default: str) -> str:
                            none
            :return: the interpolated string
         """
+        if '@{' not in value:
+            return value
+
         def replace(smo: re.Match) -> str:
             name = smo.group(1)
             if name == '':
@@ -659,7 +967,7 @@ def replace(smo: re.Match) -> str:
             if not tmp_dir.endswith(sep):
                 tmp_dir = f'{tmp_dir}{sep}'
             return tmp_dir
-        nvalue = re.sub(r'\@\{(\w*)\}/', replace, value)
+        nvalue = self.DIR_CRE.sub(replace, value)
         if nvalue != value:
             self._log.debug('Interpolate %s with %s', value, nvalue)
         return nvalue
@@ -714,16 +1022,20 @@ def create_otp_image(self, vmem: str) -> str:
         """Generate a temporary OTP image file.
 
            If a temporary file has already been generated for the input VMEM
-           file, use it instead.
+           file, use it instead. VMEM files are identified by their storage
+           location, so that the same file reached through different paths
+           is only converted once.
 
            :param vmem: path to the VMEM source file
            :return: the full path to the temporary OTP file
         """
         # pylint: disable=import-outside-toplevel
-        if vmem in self._otp_files:
-            otp_file, ref_count = self._otp_files[vmem]
+        vstat = stat(vmem)
+        vkey = (vstat.st_dev, vstat.st_ino, vstat.st_mtime_ns)
+        if vkey in self._otp_files:
+            otp_file, ref_count = self._otp_files[vkey]
             self._log.debug('Use existing %s', basename(otp_file))
-            self._otp_files[vmem] = (otp_file, ref_count + 1)
+            self._otp_files[vkey] = (otp_file, ref_count + 1)
             return otp_file
         from otptool import OtpImage
         otp = OtpImage()
@@ -736,7 +1048,8 @@ def create_otp_image(self, vmem: str) -> str:
         close(otp_fd)
         with open(otp_file, 'wb') as rfp:
             otp.save_raw(rfp)
-        self._otp_files[vmem] = (otp_file, 1)
+        self._otp_files[vkey] = (otp_file, 1)
+        self._otp_by_raw[otp_file] = vkey
         return otp_file
 
     def delete_flash_image(self, filename: str) -> None:
@@ -762,19 +1075,24 @@ def delete_otp_image(self, filename: str) -> None:
         if not isfile(filename):
             self._log.warning('No such OTP image file %s', basename(filename))
             return
-        for vmem, (raw, count) in self._otp_files.items():
-            if raw != filename:
-                continue
-            count -= 1
-            if not count:
-                self._log.debug('Delete OTP image file %s', basename(filename))
-                unlink(filename)
-                self._in_fly.discard(filename)
-                del self._otp_files[vmem]
-            else:
-                self._log.debug('Keep OTP image file %s', basename(filename))
-                self._otp_files[vmem] = (raw, count)
-            break
+        vkey = self._otp_by_raw.get(filename)
+        if vkey is None:
+            return
+        raw, count = self._otp_files[vkey]
+        count -= 1
+        if not count:
+            self._log.debug('Delete OTP image file %s', basename(filename))
+            unlink(filename)
+            self._in_fly.discard(filename)
+            del self._otp_files[vkey]
+            del self._otp_by_raw[filename]
+        else:
+            self._log.debug('Keep OTP image file %s', basename(filename))
+            self._otp_files[vkey] = (raw, count)
+
+    def _resolve_var(self, smo: re.Match) -> str:
+        name = smo.group(1)
+        return self._env[name] if name in self._env else environ.get(name, '')
 
     def _configure_logger(self, tool) -> None:
         log = getLogger('pyot')
@@ -790,16 +1108,20 @@ def _cleanup(self) -> None:
         """
         removed: set[str] = set()
         for tmpfile in self._in_fly:
-            if not isfile(tmpfile):
-                removed.add(tmpfile)
+            if self._keep_temp:
+                if not isfile(tmpfile):
+                    removed.add(tmpfile)
                 continue
-            if not self._keep_temp:
+            # do not check for file existence beforehand, simply try to
+            # delete it
+            try:
+                unlink(tmpfile)
                 self._log.debug('Delete %s', basename(tmpfile))
-                try:
-                    unlink(tmpfile)
-                    removed.add(tmpfile)
-                except OSError:
-                    self._log.error('Cannot delete %s', basename(tmpfile))
+                removed.add(tmpfile)
+            except FileNotFoundError:
+                removed.add(tmpfile)
+            except OSError:
+                self._log.error('Cannot delete %s', basename(tmpfile))
         self._in_fly -= removed
         if self._in_fly:
             if not self._keep_temp:
@@ -810,12 +1132,11 @@ def _cleanup(self) -> None:
         removed: set[str] = set()
         if not self._keep_temp:
             for tmpname, tmpdir in self._dirs.items():
-                if not isdir(tmpdir):
-                    removed.add(tmpname)
-                    continue
-                self._log.debug('Delete dir %s', tmpdir)
                 try:
                     rmtree(tmpdir)
+                    self._log.debug('Delete dir %s', tmpdir)
+                    removed.add(tmpname)
+                except FileNotFoundError:
                     removed.add(tmpname)
                 except OSError as exc:
                     self._log.error('Cannot delete %s: %s', tmpdir, exc)
@@ -831,15 +1152,22 @@ def _cleanup(self) -> None:
 class QEMUContextWorker:
 
     """Background task for QEMU context.
+
+       :param cmd: the command to execute, either as an argument list or as
+                   a string to run with the shell
+       :param env: the environment of the command
+       :param sync: an optional synchronisation event to start up the
+                    execution
+       :param done: an optional event to signal once the worker has completed
     """
 
-    def __init__(self, cmd: str, env: dict[str, str],
-                 sync: Optional[Event] = None):
+    def __init__(self, cmd: Union[str, list[str]], env: dict[str, str],
+                 sync: Optional[Event] = None, done: Optional[Event] = None):
         self._log = getLogger('pyot.cmd')
         self._cmd = cmd
         self._env = env
         self._sync = sync
-        self._log_q = deque()
+        self._done = done
         self._resume = False
         self._thread: Optional[Thread] = None
         self._ret = None
@@ -847,15 +1175,29 @@ def __init__(self, cmd: str, env: dict[str, str],
     def run(self):
         """Start the worker.
         """
-        self._thread = Thread(target=self._run, daemon=True)
+        self._thread = Thread(target=self._run_notify, daemon=True)
         self._thread.start()
 
     def stop(self) -> int:
         """Stop the worker.
         """
+        self.signal_stop()
+        return self.wait_stop()
+
+    def signal_stop(self) -> None:
+        """Request the worker to stop, without waiting for its completion.
+        """
         if self._thread is None:
             raise ValueError('Cannot stop idle worker')
         self._resume = False
+
+    def wait_stop(self) -> int:
+        """Wait for a worker, which has been requested to stop, to complete.
+
+           :return: the exit code of the worker
+        """
+        if self._thread is None:
+            raise ValueError('Cannot stop idle worker')
         self._thread.join()
         return self._ret
 
@@ -870,7 +1212,16 @@ def exit_code(self) -> Optional[int]:
     def command(self) -> str:
         """Return the executed command name.
         """
-        return normpath(self._cmd.split(' ', 1)[0])
+        if isinstance(self._cmd, str):
+            return normpath(self._cmd.split(' ', 1)[0])
+        return normpath(self._cmd[0])
+
+    def _run_notify(self):
+        try:
+            self._run()
+        finally:
+            if self._done:
+                self._done.set()
 
     def _run(self):
         self._resume = True
@@ -882,33 +1233,47 @@ def _run(self):
                     break
             self._sync.clear()
         # pylint: disable=consider-using-with
-        proc = Popen(self._cmd,  bufsize=1, stdout=PIPE, stderr=PIPE,
-                     shell=True, env=self._env, encoding='utf-8',
-                     errors='ignore', text=True)
-        Thread(target=self._logger, args=(proc, True), daemon=True).start()
-        Thread(target=self._logger, args=(proc, False), daemon=True).start()
+        proc = Popen(self._cmd,  bufsize=-1, stdout=PIPE, stderr=PIPE,
+                     shell=isinstance(self._cmd, str), env=self._env,
+                     start_new_session=True)
         qemu_exec = f'{basename(self._cmd[0])}: '
         classifier = LogMessageClassifier(qemux=qemu_exec)
-        while self._resume:
-            while self._log_q:
-                err, qline = self._log_q.popleft()
-                if err:
-                    loglevel = classifier.classify(qline)
-                    self._log.log(loglevel, qline)
-                else:
-                    self._log.debug(qline)
-            if proc.poll() is not None:
-                # worker has exited on its own
-                self._resume = False
-                break
+        # monitor both output streams from this thread, rather than using
+        # one helper thread per stream
+        log_ctxs: dict[int, tuple[bool, bytearray]] = {}
+        selector = DefaultSelector()
+        for err, stream in ((False, proc.stdout), (True, proc.stderr)):
+            set_blocking(stream.fileno(), False)
+            log_ctxs[stream.fileno()] = (err, bytearray())
+            selector.register(stream, EVENT_READ)
+        try:
+            while self._resume:
+                events = selector.select(0.1)
+                for key, _ in events:
+                    err, buf = log_ctxs[key.fd]
+                    try:
+                        data = os_read(key.fd, 65536)
+                    except BlockingIOError:
+                        continue
+                    if not data:
+                        selector.unregister(key.fileobj)
+                        continue
+                    buf += data
+                    self._log_lines(classifier, err, pop_lines(buf))
+                if not events and proc.poll() is not None:
+                    # worker has exited on its own
+                    self._resume = False
+                    break
+        finally:
+            selector.close()
         try:
             # give some time for the process to complete on its own
             proc.wait(0.2)
             self._ret = proc.returncode
             self._log.debug('"%s" completed with %d', self.command, self._ret)
         except TimeoutExpired:
-            # still executing
-            proc.terminate()
+            # still executing, also signal the processes spawned by the shell
+            signal_process_group(proc, SIGTERM)
             try:
                 # leave 1 second for QEMU to cleanly complete...
                 proc.wait(1.0)
@@ -916,29 +1281,42 @@ def _run(self):
             except TimeoutExpired:
                 # otherwise kill it
                 self._log.error('Force-killing command "%s"', self.command)
-                proc.kill()
+                signal_process_group(proc, SIGKILL)
                 self._ret = proc.returncode
-        # retrieve the remaining log messages
+        # retrieve the remaining log messages, including any incomplete line
+        partials = {err: bytes(buf) for err, buf in log_ctxs.values()}
         stdlog = self._log.info if self._ret else self._log.debug
         try:
-            for sfp, logger in zip(proc.communicate(timeout=0.1),
-                                   (stdlog, self._log.error)):
+            for err, sfp, logger in zip((False, True),
+                                        proc.communicate(timeout=0.1),
+                                        (stdlog, self._log.error)):
+                sfp = b''.join((partials[err], sfp or b''))
+                sfp = sfp.decode('utf-8', errors='ignore')
                 for line in sfp.split('\n'):
                     line = line.strip()
                     if line:
                         logger(line)
         except TimeoutExpired:
-            proc.kill()
+            signal_process_group(proc, SIGKILL)
             if self._ret is None:
                 self._ret = proc.returncode
 
-    def _logger(self, proc: Popen, err: bool):
-        # worker thread, blocking on VM stdout/stderr
-        stream = proc.stderr if err else proc.stdout
-        while proc.poll() is None:
-            line = stream.readline().strip()
-            if line:
-                self._log_q.append((err, line))
+    def _log_lines(self, classifier: LogMessageClassifier, err: bool,
+                   lines: list[bytes]) -> None:
+        if not err and not self._log.isEnabledFor(logging.DEBUG):
+            # standard output messages are only emitted as debug messages
+            return
+        # resolve the callables once for the whole batch of lines
+        classify = classifier.classify
+        emit = self._log.log
+        level = logging.DEBUG
+        for line in lines:
+            qline = line.decode('utf-8', errors='ignore').strip()
+            if not qline:
+                continue
+            if err:
+                level = classify(qline)
+            emit(level, qline)
 
 
 class QEMUContext:
@@ -947,22 +1325,38 @@ class QEMUContext:
        Execute commands before, while and after QEMU executes.
 
        :param test_name: the name of the test QEMU should execute
-       :param qfm: the file manager
        :param qemu_cmd: the command and argument to execute QEMU
        :param context: the contex configuration for the current test
+       :param env: optional environment variables for the commands
+       :param stop: an optional event to abort synchronous commands
     """
 
-    def __init__(self, test_name: str, qfm: QEMUFileManager,
-                 qemu_cmd: list[str], context: dict[str, list[str]],
-                 env: Optional[dict[str, str]] = None):
-        # pylint: disable=too-many-arguments
+    SHELL_CRE = re.compile(r'[|&;<>()$`*?[\]{}~#]')
+    """Characters that require a shell to interpret a context command."""
+
+    def __init__(self, test_name: str, qemu_cmd: list[str],
+                 context: dict[str, list[str]],
+                 env: Optional[dict[str, str]] = None,
+                 stop: Optional[Event] = None):
         self._clog = getLogger('pyot.ctx')
         self._test_name = test_name
-        self._qfm = qfm
+        self._stop = stop or Event()
         self._qemu_cmd = qemu_cmd
-        self._context = context
-        self._env = env or {}
+        # the environment of the commands does not change during the context
+        # lifetime, build it once
+        self._env = dict(environ)
+        self._env.update(env or {})
+        if self._qemu_cmd:
+            self._env['PATH'] = ':'.join((self._env['PATH'],
+                                          dirname(self._qemu_cmd[0])))
+        # commands are parsed once, when the context is created
+        self._context: dict[str, list[tuple[str, Union[str, list[str]], str,
+                                            bool]]] = {
+            ctx_name: [self._parse_command(cmd) for cmd in cmds]
+            for ctx_name, cmds in context.items()}
         self._workers: list[Popen] = []
+        # signalled whenever a background worker completes
+        self._worker_done = Event()
 
     def execute(self, ctx_name: str, code: int = 0,
                 sync: Optional[Event] = None) -> None:
@@ -984,73 +1378,150 @@ def execute(self, ctx_name: str, code: int = 0,
             self._clog.info("Discard execution of '%s' commands after failure "
                             "of '%s'", ctx_name, self._test_name)
             return
-        env = dict(environ)
-        env.update(self._env)
-        if self._qemu_cmd:
-            env['PATH'] = ':'.join((env['PATH'], dirname(self._qemu_cmd[0])))
         if ctx:
-            for cmd in ctx:
-                if cmd.endswith('&'):
+            for cmd, args, rcmd, background in ctx:
+                if background:
                     if ctx_name == 'post':
                         raise ValueError(f"Cannot execute background command "
                                          f"in [{ctx_name}] context for "
                                          f"'{self._test_name}'")
-                    cmd = normpath(cmd[:-1].rstrip())
-                    rcmd = relpath(cmd)
-                    if rcmd.startswith(pardir):
-                        rcmd = cmd
-                    rcmd = ' '.join(p if not p.startswith(sep) else basename(p)
-                                    for p in rcmd.split(' '))
                     self._clog.info('Execute "%s" in background for [%s] '
                                     'context', rcmd, ctx_name)
-                    worker = QEMUContextWorker(cmd, env, sync)
+                    worker = QEMUContextWorker(args, self._env, sync,
+                                               self._worker_done)
                     worker.run()
                     self._workers.append(worker)
                 else:
                     if sync:
                         self._clog.debug('Synchronization ignored')
-                    cmd = normpath(cmd.rstrip())
-                    rcmd = relpath(cmd)
-                    if rcmd.startswith(pardir):
-                        rcmd = cmd
-                    rcmd = ' '.join(p if not p.startswith(sep) else basename(p)
-                                    for p in rcmd.split(' '))
                     self._clog.info('Execute "%s" in sync for [%s] context',
                                     rcmd, ctx_name)
-                    # pylint: disable=consider-using-with
-                    proc = Popen(cmd, bufsize=1, stdout=PIPE, stderr=PIPE,
-                                 shell=True, env=env, encoding='utf-8',
-                                 errors='ignore', text=True)
-                    ret = 0
-                    try:
-                        outs, errs = proc.communicate(timeout=5)
-                        ret = proc.returncode
-                    except TimeoutExpired:
-                        proc.kill()
-                        outs, errs = proc.communicate()
-                        ret = proc.returncode
-                    for sfp, logger in zip(
-                            (outs, errs),
-                            (self._clog.debug,
-                             self._clog.error if ret else self._clog.info)):
-                        for line in sfp.split('\n'):
-                            line = line.strip()
-                            if line:
-                                logger(line)
+                    ret = self._execute_sync(args, self._env)
                     if ret:
                         self._clog.error("Fail to execute '%s' command for "
                                          "'%s'", cmd, self._test_name)
                         raise OSError(ret,
                                       f'Cannot execute [{ctx_name}] command')
-        if ctx_name == 'post':
-            if not self._qfm.keep_temporary:
-                self._qfm.delete_default_dir(self._test_name)
+
+    def _parse_command(self, cmd: str) \
+            -> tuple[str, Union[str, list[str]], str, bool]:
+        """Parse a context command.
+
+           Commands that do not rely on any shell feature are executed
+           directly, which saves spawning a shell for each of them.
+
+           :param cmd: the command, as defined in the configuration
+           :return: a 4-uple of the command, the argument list to execute or
+                    the command itself if it should be run with the shell, its
+                    short form for log messages, and whether it runs in
+                    background
+        """
+        background = cmd.endswith('&')
+        if background:
+            cmd = cmd[:-1]
+        cmd = normpath(cmd.rstrip())
+        args: Union[str, list[str]] = cmd
+        if not self.SHELL_CRE.search(cmd):
+            try:
+                words = shsplit(cmd)
+            except ValueError:
+                words = []
+            # variable assignments and shell builtins still need a shell
+            if words and '=' not in words[0] and \
+                    which(words[0], path=self._env['PATH']):
+                args = words
+        rcmd = relpath(cmd)
+        if rcmd.startswith(pardir):
+            rcmd = cmd
+        rcmd = ' '.join(p if not p.startswith(sep) else basename(p)
+                        for p in rcmd.split(' '))
+        return cmd, args, rcmd, background
+
+    def _execute_sync(self, cmd: Union[str, list[str]],
+                      env: dict[str, str]) -> int:
+        """Execute a synchronous command and log its output.
+
+           :param cmd: the command to execute, either as an argument list or
+                       as a string to run with the shell
+           :param env: the environment of the command
+           :return: the exit code of the command
+        """
+        # the command is run in its own process group, so that any process it
+        # spawns is also killed if the command does not complete on time, and
+        # no process is left holding the output pipes
+        errors: list[str] = []
+        # standard output is only emitted as debug messages
+        log_stdout = self._clog.isEnabledFor(logging.DEBUG)
+        with Popen(cmd, bufsize=-1, stdout=PIPE, stderr=PIPE,
+                   shell=isinstance(cmd, str), env=env,
+                   start_new_session=True) as proc, \
+                DefaultSelector() as selector:
+            log_ctxs: dict[int, tuple[bool, bytearray]] = {}
+            for err, stream in ((False, proc.stdout), (True, proc.stderr)):
+                set_blocking(stream.fileno(), False)
+                log_ctxs[stream.fileno()] = (err, bytearray())
+                selector.register(stream, EVENT_READ)
+            deadline = now() + 5
+            while selector.get_map():
+                timeout = None
+                if deadline is not None:
+                    timeout = deadline - now()
+                    if timeout <= 0 or self._stop.is_set():
+                        signal_process_group(proc, SIGKILL)
+                        # wait for the pipes to be closed
+                        deadline = timeout = None
+                    else:
+                        # wake up on time to check for an abort request
+                        timeout = min(timeout, 0.2)
+                try:
+                    events = selector.select(timeout)
+                except KeyboardInterrupt:
+                    # the command does not share the terminal process group
+                    signal_process_group(proc, SIGKILL)
+                    raise
+                for key, _ in events:
+                    err, buf = log_ctxs[key.fd]
+                    try:
+                        data = os_read(key.fd, 65536)
+                    except BlockingIOError:
+                        continue
+                    if not data:
+                        selector.unregister(key.fileobj)
+                        lines = [bytes(buf)]
+                    elif err or log_stdout:
+                        buf += data
+                        lines = pop_lines(buf)
+                    else:
+                        # drain the pipe, its content is not logged
+                        continue
+                    # emit all the received lines as a single log message
+                    block = '\n'.join(filter(None, (
+                        line.decode('utf-8', errors='ignore').strip()
+                        for line in lines)))
+                    if not block:
+                        continue
+                    if err:
+                        # log level depends on the command completion
+                        errors.append(block)
+                    else:
+                        # stdout lines are emitted as soon as received
+                        self._clog.debug('%s', block)
+            ret = proc.wait()
+        if errors:
+            logger = self._clog.error if ret else self._clog.info
+            logger('%s', '\n'.join(errors))
+        return ret
 
     def check_error(self) -> int:
         """Check if any background worker exited in error.
 
+           Workers are only inspected once one of them has completed, which
+           leaves a cheap event check while all of them are running.
+
            :return: a non-zero value on error
         """
+        if not self._worker_done.is_set():
+            return 0
         for worker in self._workers:
             ret = worker.exit_code()
             if not ret:
@@ -1065,15 +1536,19 @@ def finalize(self) -> int:
            :return: a non-zero value if one or more workers have reported an
                     error
         """
-        rets = {0}
+        # request all workers to stop at once, so that their termination
+        # delays overlap
+        for worker in self._workers:
+            worker.signal_stop()
+        max_ret = 0
         while self._workers:
             worker = self._workers.pop()
-            ret = worker.stop()
-            rets.add(ret)
+            ret = worker.wait_stop()
+            max_ret = max(max_ret, ret)
             if ret:
                 self._clog.warning('Command "%s" has failed for "%s": %d',
                                    worker.command, self._test_name, ret)
-        return max(rets)
+        return max_ret
 
 
 class QEMUExecuter:
@@ -1099,6 +1574,9 @@ class QEMUExecuter:
         QEMUWrapper.NO_MATCH_RETURN_CODE: 'UNKNOWN',
     }
 
+    RESULT_MAP_INV = {v: k for k, v in RESULT_MAP.items()}
+    """Result codes indexed by result name."""
+
     DEFAULT_START_DELAY = 1.0
     """Default start up delay to let QEMU initialize before connecting the
        virtual UART port.
@@ -1107,6 +1585,16 @@ class QEMUExecuter:
     DEFAULT_SERIAL_PORT = 'serial0'
     """Default VCP name."""
 
+    SLOT_VCP_PORTS = 16
+    """Count of TCP ports reserved for the VCPs of each execution slot."""
+
+    WILDCARD_CRE = re.compile(r'[*?[]')
+    """Wildcard characters of path filters."""
+
+    CMD_SPACES_CRE = re.compile(r'\s{2,}|[\n\r]')
+    """Whitespace sequences and line breaks to fold within context commands.
+    """
+
     LOG_SHORTCUTS = {
         'A': 'in_asm',
         'E': 'exec',
@@ -1124,7 +1612,15 @@ def __init__(self, qfm: QEMUFileManager, config: dict[str, any],
         self._args = args
         self._argdict: dict[str, Any] = {}
         self._qemu_cmd: list[str] = []
-        self._suffixes = []
+        self._suffixes: tuple[str, ...] = ()
+        self._radixes: dict[str, str] = {}
+        self._known_files: set[str] = set()
+        self._args_cache: dict[tuple, Any] = {}
+        self._build_lock = Lock()
+        # signalled to abort the running tests
+        self._stop = Event()
+        self._slots: SimpleQueue[int] = SimpleQueue()
+        self._slot_cpus: dict[int, set[int]] = {}
         if hasattr(self._args, 'opts'):
             setattr(self._args, 'global_opts', getattr(self._args, 'opts'))
             setattr(self._args, 'opts', [])
@@ -1139,11 +1635,11 @@ def build(self) -> None:
         exec_info = self._build_qemu_command(self._args)
         self._qemu_cmd = exec_info.command
         self._argdict = dict(self._args.__dict__)
-        self._suffixes = []
         suffixes = self._config.get('suffixes', [])
         if not isinstance(suffixes, list):
             raise ValueError('Invalid suffixes sub-section')
-        self._suffixes.extend(suffixes)
+        self._suffixes = tuple(suffixes)
+        self._radixes.clear()
 
     def enumerate_tests(self) -> Iterator[str]:
         """Enumerate tests to execute.
@@ -1159,14 +1655,19 @@ def run(self, debug: bool, allow_no_test: bool) -> int:
            :return: success or the code of the first encountered error
         """
         log_classifiers = self._config.get('logclass', {})
-        qot = QEMUWrapper(log_classifiers, debug)
+        qot = QEMUWrapper(log_classifiers, debug, self._stop)
         ret = 0
-        results = defaultdict(int)
+        results: dict[int, int] = {}
         result_file = self._argdict.get('result')
-        # pylint: disable=consider-using-with
-        cfp = open(result_file, 'wt', encoding='utf-8') if result_file else None
+        if isinstance(result_file, str):
+            # pylint: disable=consider-using-with
+            cfp = open(result_file, 'wt', encoding='utf-8')
+        else:
+            # result file may also be provided as a stream owned by the caller
+            cfp = result_file
+        csv = None
         try:
-            csv = csv_writer(cfp) if cfp else None
+            csv = ResultWriter(cfp) if cfp else None
             if csv:
                 csv.writerow((x.title() for x in TestResult._fields))
             app = self._argdict.get('exec')
@@ -1179,59 +1680,29 @@ def run(self, debug: bool, allow_no_test: bool) -> int:
                 ret, xtime, err = qot.run(self._qemu_cmd, timeout,
                                           self.get_test_radix(app), None,
                                           self.DEFAULT_START_DELAY)
-                results[ret] += 1
+                results[ret] = results.get(ret, 0) + 1
                 sret = self.RESULT_MAP.get(ret, ret)
                 icount = self._argdict.get('icount')
                 if csv:
                     csv.writerow(TestResult(self.get_test_radix(app), sret,
                                             xtime, icount, err))
-                    cfp.flush()
             tests = self._build_test_list()
             tcount = len(tests)
             self._log.info('Found %d tests to execute', tcount)
             if not tcount and not allow_no_test:
                 self._log.error('No test can be run')
                 return 1
+            jobs = max(1, min(int(self._argdict.get('jobs') or 1), tcount))
+            # each concurrent test is assigned its own execution slot
+            self._slots = SimpleQueue()
+            for slot in range(jobs):
+                self._slots.put(slot)
+            self._slot_cpus = self._build_slot_cpus(jobs)
             targs = None
-            temp_files = {}
-            for tpos, test in enumerate(tests, start=1):
-                self._log.info('[TEST %s] (%d/%d)', self.get_test_radix(test),
-                               tpos, tcount)
-                try:
-                    self._qfm.define_transient({
-                        'UTPATH': test,
-                        'UTDIR': normpath(dirname(test)),
-                        'UTFILE': basename(test),
-                    })
-                    test_name = self.get_test_radix(test)
-                    exec_info = self._build_qemu_test_command(test)
-                    exec_info.test_name = test_name
-                    exec_info.context.execute('pre')
-                    tret, xtime, err = qot.run(exec_info)
-                    cret = exec_info.context.finalize()
-                    if exec_info.expect_result != 0:
-                        if tret == exec_info.expect_result:
-                            self._log.info('QEMU failed with expected error, '
-                                           'assume success')
-                            tret = 0
-                        elif tret == 0:
-                            self._log.warning('QEMU success while expected '
-                                              'error %d, assume error', tret)
-                            tret = 98
-                    if tret == 0 and cret != 0:
-                        tret = 99
-                    exec_info.context.execute('post', tret)
-                # pylint: disable=broad-except
-                except Exception as exc:
-                    self._log.critical('%s', str(exc))
-                    if debug:
-                        print(format_exc(chain=False), file=stderr)
-                    tret = 99
-                    xtime = 0.0
-                    err = str(exc)
-                finally:
-                    self._qfm.cleanup_transient()
-                results[tret] += 1
+
+            def report(test_name: str, tret: int, xtime: ExecTime,
+                       err: str) -> None:
+                results[tret] = results.get(tret, 0) + 1
                 sret = self.RESULT_MAP.get(tret, tret)
                 if targs:
                     icount = self.get_namespace_arg(targs, 'icount')
@@ -1240,42 +1711,141 @@ def run(self, debug: bool, allow_no_test: bool) -> int:
                 if csv:
                     csv.writerow(TestResult(test_name, sret, xtime, icount,
                                             err))
-                    # want to commit result as soon as possible if some client
-                    # is live-tracking progress on long test runs
-                    cfp.flush()
                 else:
                     self._log.info('"%s" executed in %s (%s)',
                                    test_name, xtime, sret)
-                self._cleanup_temp_files(temp_files)
+
+            if jobs == 1:
+                # run tests from the main thread, so that an interruption
+                # immediately terminates the current test
+                for tpos, test in enumerate(tests, start=1):
+                    report(*self._run_test(qot, test, tpos, tcount, debug))
+            else:
+                executor = ThreadPoolExecutor(max_workers=jobs)
+                try:
+                    futures = [executor.submit(self._run_test, qot, test, tpos,
+                                               tcount, debug)
+                               for tpos, test in enumerate(tests, start=1)]
+                    # results are reported in test order, each one as soon as
+                    # all the previous tests have completed
+                    for future in futures:
+                        report(*future.result())
+                except KeyboardInterrupt:
+                    # QEMU and commands do not share the terminal process
+                    # group, request the running tests to terminate them
+                    self._stop.set()
+                    raise
+                finally:
+                    # do not start pending tests on early exit
+                    executor.shutdown(wait=False, cancel_futures=True)
         finally:
-            if cfp:
+            if csv:
+                csv.close()
+            if cfp and cfp is not result_file:
                 cfp.close()
         for kind in sorted(results):
             self._log.info('%s count: %d',
                            self.RESULT_MAP.get(kind, kind),
                            results[kind])
-        # sort by the largest occurence, discarding success
-        errors = sorted((x for x in results.items() if x[0]),
-                        key=lambda x: -x[1])
         # overall return code is the most common error, or success otherwise
-        ret = errors[0][0] if errors else 0
+        ret = max((x for x in results.items() if x[0]), key=lambda x: x[1],
+                  default=(0, 0))[0]
         self._log.info('Total count: %d, overall result: %s',
                        sum(results.values()),
                        self.RESULT_MAP.get(ret, ret))
         return ret
 
+    def _run_test(self, qot: QEMUWrapper, test: str, tpos: int, tcount: int,
+                  debug: bool) \
+            -> tuple[str, int, ExecTime, str]:
+        """Execute a single test, along with its contexts.
+
+           :param qot: the QEMU engine
+           :param test: the path to the test to execute
+           :param tpos: the position of the test in the test list
+           :param tcount: the count of tests to execute
+           :param debug: whether running in debug mode
+           :return: a 4-uple of test name, exit code, execution time, and last
+                    error
+        """
+        test_name = self.get_test_radix(test)
+        self._log.info('[TEST %s] (%d/%d)', test_name, tpos, tcount)
+        slot = self._slots.get()
+        exec_info = None
+        try:
+            # transient variables, temporary directories and files are shared,
+            # so file manager is only ever used by one test at a time
+            with self._build_lock:
+                try:
+                    self._qfm.define_transient({
+                        'UTPATH': test,
+                        'UTDIR': normpath(dirname(test)),
+                        'UTFILE': basename(test),
+                    })
+                    exec_info = self._build_qemu_test_command(test, slot)
+                finally:
+                    self._qfm.cleanup_transient()
+            exec_info.test_name = test_name
+            exec_info.cpus = self._slot_cpus.get(slot)
+            exec_info.context.execute('pre')
+            tret, xtime, err = qot.run(exec_info)
+            cret = exec_info.context.finalize()
+            if exec_info.expect_result != 0:
+                if tret == exec_info.expect_result:
+                    self._log.info('QEMU failed with expected error, '
+                                   'assume success')
+                    tret = 0
+                elif tret == 0:
+                    self._log.warning('QEMU success while expected '
+                                      'error %d, assume error', tret)
+                    tret = 98
+            if tret == 0 and cret != 0:
+                tret = 99
+            exec_info.context.execute('post', tret)
+            # keep the default directory of a failed test for inspection
+            if tret == 0 and not self._qfm.keep_temporary:
+                with self._build_lock:
+                    self._qfm.delete_default_dir(test_name)
+        except KeyboardInterrupt:
+            # background commands do not share the terminal process group
+            if exec_info:
+                exec_info.context.finalize()
+            raise
+        # pylint: disable=broad-except
+        except Exception as exc:
+            self._log.critical('%s', str(exc))
+            if debug:
+                print(format_exc(chain=False), file=stderr)
+            if exec_info:
+                # do not leave background commands running
+                exec_info.context.finalize()
+            tret = 99
+            xtime = 0.0
+            err = str(exc)
+        finally:
+            if exec_info:
+                with self._build_lock:
+                    self._cleanup_temp_files(exec_info.tmpfiles)
+            self._slots.put(slot)
+        return test_name, tret, xtime, err
+
     def get_test_radix(self, filename: str) -> str:
         """Extract the radix name from a test pathname.
 
            :param filename: the path to the test executable
            :return: the test name
         """
-        test_name = basename(filename).split('.')[0]
-        for suffix in self._suffixes:
-            if not test_name.endswith(suffix):
-                continue
-            return test_name[:-len(suffix)]
-        return test_name
+        radix = self._radixes.get(filename)
+        if radix is not None:
+            return radix
+        radix = basename(filename).split('.', 1)[0]
+        if radix.endswith(self._suffixes):
+            for suffix in self._suffixes:
+                if radix.endswith(suffix):
+                    radix = radix[:-len(suffix)]
+                    break
+        self._radixes[filename] = radix
+        return radix
 
     @classmethod
     def get_namespace_arg(cls, args: Namespace, name: str) -> Optional[str]:
@@ -1287,12 +1857,6 @@ def get_namespace_arg(cls, args: Namespace, name: str) -> Optional[str]:
         """
         return args.__dict__.get(name)
 
-    @staticmethod
-    def flatten(lst: list) -> list:
-        """Flatten a list.
-        """
-        return [item for sublist in lst for item in sublist]
-
     @staticmethod
     def abspath(path: str) -> str:
         """Build absolute path"""
@@ -1322,43 +1886,71 @@ def _cleanup_temp_files(self, storage: dict[str, set[str]]) -> None:
             for filename in files:
                 delete_file(filename)
 
+    @staticmethod
+    def _build_slot_cpus(jobs: int) -> dict[int, set[int]]:
+        """Distribute the host CPUs available to this process among the
+           execution slots, so that concurrent QEMU instances do not compete
+           for the same cores and caches.
+
+           :param jobs: the count of execution slots
+           :return: the CPUs assigned to each slot, which is empty if QEMU
+                    instances should not be pinned
+        """
+        if jobs < 2 or not sched_getaffinity:
+            return {}
+        cpus = sorted(sched_getaffinity(0))
+        if len(cpus) < jobs:
+            # slots would share CPUs anyway, let the host scheduler decide
+            return {}
+        return {slot: set(cpus[slot::jobs]) for slot in range(jobs)}
+
+    def _isfile(self, path: str) -> bool:
+        """Tell whether a path designates an existing file.
+
+           Files such as ROM, OTP or bootloader images are shared by most
+           tests, so only the first successful check of a path queries the
+           file system.
+
+           :param path: the path to check
+           :return: True if the file exists
+        """
+        if path in self._known_files:
+            return True
+        if not isfile(path):
+            return False
+        self._known_files.add(path)
+        return True
+
+    def _cached_args(self, key: tuple, builder: Callable[[], Any]) -> Any:
+        """Retrieve QEMU arguments that only depend on the provided key,
+           building them on first use.
+
+           Most of the QEMU command line is identical for all the tests, so
+           it is only built once rather than for each test. Cached values are
+           shared and should not be modified.
+
+           :param key: the values the arguments depend on
+           :param builder: the function that builds the arguments
+           :return: the arguments
+        """
+        try:
+            return self._args_cache[key]
+        except KeyError:
+            value = self._args_cache[key] = builder()
+            return value
+
     def _build_qemu_fw_args(self, args: Namespace) \
             -> tuple[str, str, list[str]]:
         rom_exec = bool(args.rom_exec)
-        roms = args.rom or []
+        roms = tuple(self._qfm.interpolate(rom) for rom in args.rom or [])
         multi_rom = (len(roms) + int(rom_exec)) > 1
         # generate pre-application ROM option
-        fw_args: list[str] = []
-        machine = args.machine
-        variant = args.variant
-        chiplet_count = 1
-        if variant:
-            machine = f'{machine},variant={variant}'
-            try:
-                chiplet_count = sum(int(x)
-                                    for x in re.split(r'[A-Za-z]', variant)
-                                    if x)
-            except ValueError:
-                self._log.warning('Unknown variant syntax %s', variant)
-        for chip_id in range(chiplet_count):
-            rom_count = 0
-            for rom in roms:
-                rom_path = self._qfm.interpolate(rom)
-                if not isfile(rom_path):
-                    raise ValueError(f'Unable to find ROM file {rom_path}')
-                rom_ids = []
-                if args.first_soc:
-                    if chiplet_count == 1:
-                        rom_ids.append(f'{args.first_soc}.')
-                    else:
-                        rom_ids.append(f'{args.first_soc}{chip_id}.')
-                rom_ids.append('rom')
-                if multi_rom:
-                    rom_ids.append(f'{rom_count}')
-                rom_id = ''.join(rom_ids)
-                rom_opt = f'ot-rom_img,id={rom_id},file={rom_path}'
-                fw_args.extend(('-object', rom_opt))
-                rom_count += 1
+        machine, chiplet_count, rom_args = self._cached_args(
+            ('rom', args.machine, args.variant, roms, multi_rom,
+             args.first_soc),
+            lambda: self._build_qemu_rom_args(args, roms, multi_rom))
+        fw_args = list(rom_args)
+        rom_count = len(roms)
         xtype = None
         if args.exec:
             exec_path = self.abspath(args.exec)
@@ -1389,6 +1981,47 @@ def _build_qemu_fw_args(self, args: Namespace) \
                     fw_args.extend(('-kernel', exec_path))
         return machine, xtype, fw_args
 
+    def _build_qemu_rom_args(self, args: Namespace, roms: tuple[str, ...],
+                             multi_rom: bool) -> tuple[str, int, list[str]]:
+        """Build the machine definition and the pre-application ROM options.
+
+           :param args: the parsed arguments
+           :param roms: the interpolated paths to the ROM files
+           :param multi_rom: whether several ROMs are used
+           :return: a 3-uple of machine, chiplet count and ROM options
+        """
+        fw_args: list[str] = []
+        machine = args.machine
+        variant = args.variant
+        chiplet_count = 1
+        if variant:
+            machine = f'{machine},variant={variant}'
+            try:
+                chiplet_count = sum(int(x)
+                                    for x in re.split(r'[A-Za-z]', variant)
+                                    if x)
+            except ValueError:
+                self._log.warning('Unknown variant syntax %s', variant)
+        for chip_id in range(chiplet_count):
+            rom_count = 0
+            for rom_path in roms:
+                if not self._isfile(rom_path):
+                    raise ValueError(f'Unable to find ROM file {rom_path}')
+                rom_ids = []
+                if args.first_soc:
+                    if chiplet_count == 1:
+                        rom_ids.append(f'{args.first_soc}.')
+                    else:
+                        rom_ids.append(f'{args.first_soc}{chip_id}.')
+                rom_ids.append('rom')
+                if multi_rom:
+                    rom_ids.append(f'{rom_count}')
+                rom_id = ''.join(rom_ids)
+                rom_opt = f'ot-rom_img,id={rom_id},file={rom_path}'
+                fw_args.extend(('-object', rom_opt))
+                rom_count += 1
+        return machine, chiplet_count, fw_args
+
     def _build_qemu_log_sources(self, args: Namespace) -> list[str]:
         if not args.log:
             return []
@@ -1405,7 +2038,7 @@ def _build_qemu_log_sources(self, args: Namespace) -> list[str]:
                 log_args.append(logname)
         return ['-d', ','.join(log_args)]
 
-    def _build_qemu_vcp_args(self, args: Namespace) -> \
+    def _build_qemu_vcp_args(self, args: Namespace, slot: int = 0) -> \
             tuple[list[str], dict[str, tuple[str, int]]]:
         device = args.device
         devdesc = device.split(':')
@@ -1420,6 +2053,14 @@ def _build_qemu_vcp_args(self, args: Namespace) -> \
             raise ValueError(f'Invalid TCP serial device: {device}') from exc
         mux = f'mux={"on" if args.muxserial else "off"}'
         vcps = args.vcp or [self.DEFAULT_SERIAL_PORT]
+        # each execution slot uses its own range of TCP ports, so that QEMU
+        # instances may run side by side, whatever their count of VCPs
+        if len(vcps) > self.SLOT_VCP_PORTS:
+            raise ValueError(f'Too many VCPs: {len(vcps)}, up to '
+                             f'{self.SLOT_VCP_PORTS} supported')
+        port += slot * self.SLOT_VCP_PORTS
+        if port + len(vcps) > 65536:
+            raise ValueError(f'No TCP port available for slot {slot}')
         vcp_args = ['-display', 'none']
         vcp_map = {}
         for vix, vcp in enumerate(vcps):
@@ -1432,12 +2073,14 @@ def _build_qemu_vcp_args(self, args: Namespace) -> \
         return vcp_args, vcp_map
 
     def _build_qemu_command(self, args: Namespace,
-                            opts: Optional[list[str]] = None) \
-            -> EasyDict[str, Any]:
+                            opts: Optional[list[str]] = None,
+                            slot: int = 0) -> EasyDict[str, Any]:
         """Build QEMU command line from argparser values.
 
            :param args: the parsed arguments
            :param opts: any QEMU-specific additional options
+           :param slot: the execution slot, which selects the TCP ports of
+                        the QEMU instance
            :return: a dictionary defining how to execute the command
         """
         if args.qemu is None:
@@ -1447,14 +2090,14 @@ def _build_qemu_command(self, args: Namespace,
         if args.otcfg:
             qemu_args.extend(('-readconfig', self.abspath(args.otcfg)))
         qemu_args.extend(fw_args)
-        temp_files = defaultdict(set)
+        temp_files: dict[str, set[str]] = {}
         if all((args.otp, args.otp_raw)):
             raise ValueError('OTP VMEM and RAW options are mutually exclusive')
         if args.otp:
-            if not isfile(args.otp):
+            if not self._isfile(args.otp):
                 raise ValueError(f'No such OTP file: {args.otp}')
             otp_file = self._qfm.create_otp_image(args.otp)
-            temp_files['otp'].add(otp_file)
+            temp_files.setdefault('otp', set()).add(otp_file)
             qemu_args.extend(('-drive',
                               f'if=pflash,file={otp_file},format=raw'))
         elif args.otp_raw:
@@ -1464,7 +2107,7 @@ def _build_qemu_command(self, args: Namespace,
         if args.flash:
             if xtype == 'spiflash':
                 raise ValueError('Cannot use a flash file with a flash test')
-            if not isfile(args.flash):
+            if not self._isfile(args.flash):
                 raise ValueError(f'No such flash file: {args.flash}')
             if any((args.exec, args.boot)):
                 raise ValueError('Flash file argument is mutually exclusive '
@@ -1475,11 +2118,11 @@ def _build_qemu_command(self, args: Namespace,
         elif any((args.exec, args.boot)):
             if args.exec and not isfile(args.exec):
                 raise ValueError(f'No such exec file: {args.exec}')
-            if args.boot and not isfile(args.boot):
+            if args.boot and not self._isfile(args.boot):
                 raise ValueError(f'No such bootloader file: {args.boot}')
             if args.embedded_flash:
                 flash_file = self._qfm.create_eflash_image(args.exec, args.boot)
-                temp_files['flash'].add(flash_file)
+                temp_files.setdefault('flash', set()).add(flash_file)
                 qemu_args.extend(('-drive', f'if=mtd,bus=1,file={flash_file},'
                                  f'format=raw'))
         if args.log_file:
@@ -1489,7 +2132,9 @@ def _build_qemu_command(self, args: Namespace,
             args.trace.close()
             qemu_args.extend(('-trace',
                               f'events={self.abspath(args.trace.name)}'))
-        qemu_args.extend(self._build_qemu_log_sources(args))
+        qemu_args.extend(self._cached_args(
+            ('log', tuple(args.log or ())),
+            lambda: self._build_qemu_log_sources(args)))
         if args.singlestep:
             qemu_args.append('-singlestep')
         if 'icount' in args:
@@ -1503,7 +2148,9 @@ def _build_qemu_command(self, args: Namespace,
                 from exc
         start_delay *= args.timeout_factor
         trigger = getattr(args, 'trigger', '')
-        vcp_args, vcp_map = self._build_qemu_vcp_args(args)
+        vcp_args, vcp_map = self._cached_args(
+            ('vcp', args.device, args.muxserial, tuple(args.vcp or ()), slot),
+            lambda: self._build_qemu_vcp_args(args, slot))
         qemu_args.extend(vcp_args)
         qemu_args.extend(args.global_opts or [])
         if opts:
@@ -1512,11 +2159,12 @@ def _build_qemu_command(self, args: Namespace,
                         tmpfiles=temp_files, start_delay=start_delay,
                         trigger=trigger)
 
-    def _build_qemu_test_command(self, filename: str) -> EasyDict[str, Any]:
+    def _build_qemu_test_command(self, filename: str, slot: int = 0) \
+            -> EasyDict[str, Any]:
         test_name = self.get_test_radix(filename)
         args, opts, timeout, texp = self._build_test_args(test_name)
         setattr(args, 'exec', filename)
-        exec_info = self._build_qemu_command(args, opts)
+        exec_info = self._build_qemu_command(args, opts, slot)
         exec_info.pop('connection', None)
         exec_info.args = args
         exec_info.context = self._build_test_context(test_name)
@@ -1536,27 +2184,20 @@ def _build_test_list(self, alphasort: bool = True) -> list[str]:
             tfilters = ['*'] + pfilters
         else:
             tfilters = list(pfilters)
+        # match test names against all filters at once
+        tmatch = re.compile('|'.join(translate(f) for f in tfilters)).match
         inc_filters = self._build_config_list('include')
         if inc_filters:
             self._log.debug('Searching for tests from %s dir', testdir)
-            for path_filter in filter(None, inc_filters):
-                if testdir:
-                    path_filter = joinpath(testdir, path_filter)
-                paths = set(glob(path_filter, recursive=True))
-                for path in paths:
-                    if isfile(path):
-                        for tfilter in tfilters:
-                            if fnmatchcase(self.get_test_radix(path), tfilter):
-                                pathnames.add(path)
-                                break
+            for path in self._find_files(testdir, inc_filters):
+                if tmatch(self.get_test_radix(path)):
+                    pathnames.add(path)
         for testfile in self._enumerate_from('include_from'):
             if not isfile(testfile):
                 raise ValueError(f'Unable to locate test file '
                                  f'"{testfile}"')
-            for tfilter in tfilters:
-                if fnmatchcase(self.get_test_radix(testfile),
-                               tfilter):
-                    pathnames.add(testfile)
+            if tmatch(self.get_test_radix(testfile)):
+                pathnames.add(testfile)
         if not pathnames:
             return []
         roms = self._argdict.get('rom')
@@ -1565,16 +2206,61 @@ def _build_test_list(self, alphasort: bool = True) -> list[str]:
         exc_filters = self._build_config_list('exclude')
         xtfilters.extend(exc_filters)
         if xtfilters:
-            for path_filter in filter(None, xtfilters):
-                if testdir:
-                    path_filter = joinpath(testdir, path_filter)
-                paths = set(glob(path_filter, recursive=True))
-                pathnames -= paths
+            pathnames.difference_update(self._find_files(testdir, xtfilters))
         pathnames -= set(self._enumerate_from('exclude_from'))
         if alphasort:
             return sorted(pathnames, key=basename)
         return list(pathnames)
 
+    def _find_files(self, testdir: str, path_filters: list[str]) -> set[str]:
+        """Find the files that match any of the path filters.
+
+           Directory trees are walked concurrently when there are several
+           filters, so that the file system I/O of each walk overlaps.
+
+           :param testdir: the directory path filters are relative to
+           :param path_filters: the glob-like path filters
+           :return: the matching file paths
+        """
+        path_filters = [joinpath(testdir, f) if testdir else f
+                        for f in path_filters if f]
+        if len(path_filters) < 2:
+            return set(chain.from_iterable(map(self._iter_files,
+                                               path_filters)))
+        with ThreadPoolExecutor(max_workers=min(8, len(path_filters))) as exe:
+            return set(chain.from_iterable(
+                exe.map(lambda f: list(self._iter_files(f)), path_filters)))
+
+    def _iter_files(self, path_filter: str) -> Iterator[str]:
+        """Enumerate the files that match a path filter.
+
+           When only the last path component contains wildcards, and the
+           filter is not recursive, the parent directory is scanned once,
+           using the file type cached by the directory entries rather than
+           querying each matching path.
+
+           :param path_filter: a glob-like path filter
+           :return: an iterator on the matching file paths
+        """
+        dirpart, namepart = split(path_filter)
+        if not dirpart or '**' in path_filter or \
+                self.WILDCARD_CRE.search(dirpart):
+            for path in glob(path_filter, recursive=True):
+                if isfile(path):
+                    yield path
+            return
+        # hidden files are only matched explicitly, as with glob
+        hidden = namepart.startswith('.')
+        try:
+            with scandir(dirpart) as entries:
+                for entry in entries:
+                    if entry.name.startswith('.') and not hidden:
+                        continue
+                    if fnmatchcase(entry.name, namepart) and entry.is_file():
+                        yield entry.path
+        except OSError:
+            return
+
     def _enumerate_from(self, config_entry: str) -> Iterator[str]:
         incf_filters = self._build_config_list(config_entry)
         if incf_filters:
@@ -1585,14 +2271,15 @@ def _enumerate_from(self, config_entry: str) -> Iterator[str]:
                 self._log.debug('Loading test list from %s', incf)
                 incf_dir = dirname(incf)
                 with open(incf, 'rt', encoding='utf-8') as ifp:
-                    for testfile in ifp:
-                        testfile = re.sub('#.*$', '', testfile).strip()
-                        if not testfile:
-                            continue
-                        testfile = self._qfm.interpolate(testfile)
-                        if not testfile.startswith(sep):
-                            testfile = joinpath(incf_dir, testfile)
-                        yield normpath(testfile)
+                    testfiles = ifp.read().splitlines()
+                for testfile in testfiles:
+                    testfile = testfile.partition('#')[0].strip()
+                    if not testfile:
+                        continue
+                    testfile = self._qfm.interpolate(testfile)
+                    if not isabs(testfile):
+                        testfile = joinpath(incf_dir, testfile)
+                    yield normpath(testfile)
 
     def _build_config_list(self, config_entry: str) -> list:
         cfglist = []
@@ -1648,22 +2335,26 @@ def _build_test_args(self, test_name: str) \
             kwargs.update(test_cfg)
             opts = kwargs.get('opts')
             if opts and not isinstance(opts, list):
-                raise ValueError('fInvalid QEMU options for {test_name}')
-            opts = self.flatten([opt.split(' ') for opt in opts])
-            opts = [self._qfm.interpolate(opt) for opt in opts]
-            opts = self.flatten([opt.split(' ') for opt in opts])
-            opts = [self._qfm.interpolate_dirs(opt, test_name) for opt in opts]
+                raise ValueError(f'Invalid QEMU options for {test_name}')
+            # variables may expand to several options, split once expanded
+            tokens = []
+            for opt in opts:
+                try:
+                    tokens.extend(shsplit(self._qfm.interpolate(opt)))
+                except ValueError as exc:
+                    raise ValueError(f'Invalid QEMU options for {test_name}: '
+                                     f'{exc}') from exc
+            opts = [self._qfm.interpolate_dirs(tok, test_name)
+                    for tok in tokens]
         timeout = float(kwargs.get('timeout', DEFAULT_TIMEOUT))
         tmfactor = float(kwargs.get('timeout_factor', DEFAULT_TIMEOUT_FACTOR))
         itimeout = int(timeout * tmfactor)
         texpect = kwargs.get('expect', 0)
         try:
             texp = int(texpect)
-        except ValueError:
-            result_map = {v: k for k, v in self.RESULT_MAP.items()}
-            try:
-                texp = result_map[texpect.upper()]
-            except KeyError as exc:
+        except ValueError as exc:
+            texp = self.RESULT_MAP_INV.get(texpect.upper())
+            if texp is None:
                 raise ValueError(f'Unsupported expect: {texpect}') from exc
         return Namespace(**kwargs), opts or [], itimeout, texp
 
@@ -1684,8 +2375,7 @@ def _build_test_context(self, test_name: str) -> QEMUContext:
                     if not isinstance(cmd, str):
                         raise ValueError(f'Invalid command #{pos} in '
                                          f'"{ctx_name}" for test {test_name}')
-                    cmd = re.sub(r'[\n\r]', ' ', cmd.strip())
-                    cmd = re.sub(r'\s{2,}', ' ', cmd)
+                    cmd = self.CMD_SPACES_CRE.sub(' ', cmd.strip())
                     cmd = self._qfm.interpolate(cmd)
                     cmd = self._qfm.interpolate_dirs(cmd, test_name)
                     context[ctx_name].append(cmd)
@@ -1694,8 +2384,8 @@ def _build_test_context(self, test_name: str) -> QEMUContext:
                 if not isinstance(env, dict):
                     raise ValueError('Invalid context environment')
                 test_env = {k: self._qfm.interpolate(v) for k, v in env.items()}
-        return QEMUContext(test_name, self._qfm, self._qemu_cmd, dict(context),
-                           test_env)
+        return QEMUContext(test_name, self._qemu_cmd, dict(context), test_env,
+                           self._stop)
 
 
 def main():
@@ -1706,6 +2396,7 @@ def main():
     if not isfile(qemu_path):
         qemu_path = None
     tmp_result: Optional[str] = None
+    tmp_cfp: Optional[TextIO] = None
     try:
         args: Optional[Namespace] = None
         desc = modules[__name__].__doc__.split('.', 1)[0].strip()
@@ -1779,6 +2470,8 @@ def main():
         exe.add_argument('-F', '--filter', metavar='TEST', action='append',
                          help='run tests with matching filter, prefix with "!" '
                               'to exclude matching tests')
+        exe.add_argument('-j', '--jobs', type=int, metavar='N',
+                         help='run up to N tests in parallel (default: 1)')
         exe.add_argument('-k', '--timeout', metavar='SECONDS', type=float,
                          help=f'exit after the specified seconds '
                               f'(default: {DEFAULT_TIMEOUT} secs)')
@@ -1809,22 +2502,22 @@ def main():
         extra.add_argument('--warn', action='append', metavar='LOGGER',
                            help='assign warning level to logger(s)')
 
-        try:
-            # all arguments after `--` are forwarded to QEMU
-            pos = argv.index('--')
-            sargv = argv[1:pos]
-            opts = argv[pos+1:]
-        except ValueError:
-            sargv = argv[1:]
-            opts = []
+        # all arguments after `--` are forwarded to QEMU
+        pos = next((pos for pos, arg in enumerate(argv) if arg == '--'),
+                   len(argv))
+        sargv = argv[1:pos]
+        opts = argv[pos+1:]
         cli_opts = list(opts)
         args = argparser.parse_args(sargv)
         if args.debug is not None:
             debug = args.debug
         if args.summary and not args.result:
+            # results are written to the temporary file, then read back from
+            # the same stream
             tmpfd, tmp_result = mkstemp(suffix='.csv')
-            close(tmpfd)
-            args.result = tmp_result
+            # pylint: disable=consider-using-with
+            tmp_cfp = open(tmpfd, 'w+t', encoding='utf-8')
+            args.result = tmp_cfp
 
         log = configure_loggers(args.verbose, 'pyot',
                                 args.vcp_verbose or 0,
@@ -1844,7 +2537,16 @@ def main():
         json = {}
         if args.config:
             qfm.set_config_dir(dirname(args.config.name))
-            json = jload(args.config)
+            # read the whole configuration at once, then parse it. Plain JSON
+            # files are parsed with the fastest available parser, HJSON syntax
+            # requires the slower HJSON parser
+            cfgdata = args.config.read()
+            try:
+                json = jloads(cfgdata)
+            except ValueError:
+                if not hjloads:
+                    raise
+                json = hjloads(cfgdata)
             if 'aliases' in json:
                 aliases = json['aliases']
                 if not isinstance(aliases, dict):
@@ -1856,32 +2558,33 @@ def main():
                 # config file -only option, not exposed to the argparser
                 del jdefaults['vcp-color']
                 ColorLogFormatter.override_xcolors(xcolors)
+            # JSON defaults are converted into a command line, parsed with
+            # the same parser to validate and convert their values. Each
+            # option and its value are joined into a single argument, so that
+            # unknown defaults can be reported by name.
             jargs = []
             for arg, val in jdefaults.items():
-                is_bool = isinstance(val, bool)
-                if is_bool:
-                    if not val:
-                        continue
+                if val is False:
+                    continue
                 optname = f'--{arg}' if len(arg) > 1 else f'-{arg}'
-                if isinstance(val, list):
-                    for valit in val:
-                        jargs.append(f'{optname}={qfm.interpolate(valit)}')
-                else:
+                if val is True:
                     jargs.append(optname)
-                    if is_bool:
-                        continue
-                    # arg parser expects only string args, and substitute shell
-                    # env.
-                    val = qfm.interpolate(val)
-                    jargs.append(val)
-            if jargs:
-                jwargs = argparser.parse_args(jargs)
-                # pylint: disable=protected-access
-                for name, val in jwargs._get_kwargs():
-                    if not hasattr(args, name):
-                        argparser.error(f'Unknown config file default: {name}')
-                    if getattr(args, name) is None:
-                        setattr(args, name, val)
+                    continue
+                # arg parser expects only string args, and substitute shell
+                # env.
+                jargs.extend(f'{optname}={qfm.interpolate(valit)}'
+                             for valit in (val if isinstance(val, list)
+                                           else [val]))
+            jwargs, unknowns = argparser.parse_known_args(jargs, Namespace())
+            if unknowns:
+                names = sorted({u.split('=', 1)[0].lstrip('-')
+                                for u in unknowns})
+                argparser.error(f'Unknown config file default: '
+                                f'{", ".join(names)}')
+            argdict = vars(args)
+            for name, val in vars(jwargs).items():
+                if argdict[name] is None:
+                    argdict[name] = val
         elif args.filter:
             argparser.error('Filter option only valid with a config file')
         if cli_opts:
@@ -1900,9 +2603,10 @@ def main():
             'device': DEFAULT_DEVICE,
             'machine': DEFAULT_MACHINE,
         }
+        argdict = vars(args)
         for name, val in defaults.items():
-            if getattr(args, name) is None:
-                setattr(args, name, val)
+            if argdict[name] is None:
+                argdict[name] = val
         qfm.set_qemu_bin_dir(dirname(args.qemu))
         qexc = QEMUExecuter(qfm, json, args)
         if args.list:
@@ -1918,6 +2622,8 @@ def main():
         ret = qexc.run(debug, args.zero)
         if args.summary:
             rfmt = ResultFormatter()
+            if tmp_cfp:
+                tmp_cfp.seek(0)
             rfmt.load(args.result)
             rfmt.show(True)
         log.debug('End of execution with code %d', ret or 0)
@@ -1931,8 +2637,14 @@ def main():
     except KeyboardInterrupt:
         sysexit(2)
     finally:
-        if tmp_result and isfile(tmp_result):
-            unlink(tmp_result)
+        if tmp_cfp:
+            tmp_cfp.close()
+        # only set once the temporary file has been created
+        if tmp_result:
+            try:
+                unlink(tmp_result)
+            except FileNotFoundError:
+                pass
 
 
 if __name__ == '__main__':
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+
+# Copyright (c) 2023-2024 Rivos, Inc.
+# SPDX-License-Identifier: Apache2
+
+"""OpenTitan QEMU unit test sequencer tests.
+"""
+
+from argparse import Namespace
+from glob import glob
+from os import makedirs
+from os.path import dirname, isfile, join as joinpath
+from tempfile import TemporaryDirectory
+from time import sleep, time as now
+from unittest import TestCase, main
+from unittest.mock import patch
+
+import logging
+
+from pyot import (LogMessageClassifier, QEMUExecuter, QEMUFileManager,
+                  ResultWriter, pop_lines)
+
+
+class IterFilesTestCase(TestCase):
+    """Test the test file enumeration."""
+
+    FILES = (
+        'a.elf',
+        'b.bin',
+        '.hidden.elf',
+        'sub/c.elf',
+        'sub/deep/d.elf',
+        'sub/deep/e.bin',
+        'other/f.elf',
+    )
+
+    def setUp(self):
+        # pylint: disable=consider-using-with
+        self._tmpdir = TemporaryDirectory()
+        self._root = self._tmpdir.name
+        for name in self.FILES:
+            path = joinpath(self._root, name)
+            makedirs(dirname(path), exist_ok=True)
+            with open(path, 'wb'):
+                pass
+        self._exc = QEMUExecuter(QEMUFileManager(), {}, Namespace())
+
+    def tearDown(self):
+        self._tmpdir.cleanup()
+
+    def _check(self, path_filter: str) -> list[str]:
+        path_filter = joinpath(self._root, path_filter)
+        # pylint: disable=protected-access
+        found = sorted(self._exc._iter_files(path_filter))
+        expected = sorted(p for p in glob(path_filter, recursive=True)
+                          if isfile(p))
+        self.assertEqual(found, expected, path_filter)
+        return found
+
+    def test_single_level(self):
+        """Name patterns only match the files of their directory."""
+        self.assertEqual(len(self._check('*.elf')), 1)
+        self.assertEqual(len(self._check('sub/*')), 1)
+        self.assertEqual(len(self._check('sub/deep/[d]*')), 1)
+        self.assertEqual(len(self._check('.*')), 1)
+        self.assertEqual(len(self._check('a.elf')), 1)
+        self.assertEqual(len(self._check('none/*.elf')), 0)
+
+    def test_recursive(self):
+        """Recursive patterns match the files of all subdirectories."""
+        self.assertEqual(len(self._check('**')), 6)
+        self.assertEqual(len(self._check('sub/**')), 3)
+        self.assertEqual(len(self._check('**/*.elf')), 4)
+        self.assertEqual(len(self._check('sub/**/*.bin')), 1)
+        self.assertEqual(len(self._check('*/deep/*')), 2)
+
+
+class VcpPortsTestCase(TestCase):
+    """Test the VCP port allocation of the execution slots."""
+
+    def _ports(self, slot: int, vcps: list[str]) -> set[int]:
+        exc = QEMUExecuter(QEMUFileManager(), {}, Namespace())
+        args = Namespace(device='localhost:8000', muxserial=False, vcp=vcps)
+        # pylint: disable=protected-access
+        _, vcp_map = exc._build_qemu_vcp_args(args, slot)
+        return {port for _, port in vcp_map.values()}
+
+    def test_slots(self):
+        """Slots never share ports, whatever their count of VCPs."""
+        used = set()
+        for slot, count in enumerate((2, 1, 3, 1)):
+            ports = self._ports(slot, [f'serial{v}' for v in range(count)])
+            self.assertEqual(len(ports), count)
+            self.assertFalse(used & ports)
+            used |= ports
+
+    def test_too_many(self):
+        """VCP count is limited by the slot range of ports."""
+        count = QEMUExecuter.SLOT_VCP_PORTS + 1
+        with self.assertRaises(ValueError):
+            self._ports(0, [f'serial{v}' for v in range(count)])
+
+
+class TestOptionsTestCase(TestCase):
+    """Test the parsing of the per-test QEMU options."""
+
+    def _opts(self, opts: list[str]) -> list[str]:
+        config = {'tests': {'test': {'opts': opts}}}
+        exc = QEMUExecuter(QEMUFileManager(), config, Namespace())
+        # pylint: disable=protected-access
+        return exc._build_test_args('test')[1]
+
+    def test_quotes(self):
+        """Quoted words are kept as a single option."""
+        self.assertEqual(self._opts(['-global a.b=c', "-append 'd e'"]),
+                         ['-global', 'a.b=c', '-append', 'd e'])
+
+    def test_unbalanced(self):
+        """Unbalanced quotes are reported."""
+        with self.assertRaisesRegex(ValueError, 'Invalid QEMU options'):
+            self._opts(['-append "d e'])
+
+
+class PopLinesTestCase(TestCase):
+    """Test the reception buffer line splitter."""
+
+    def test_pop_lines(self):
+        """Complete lines are extracted, the partial line is kept."""
+        buf = bytearray(b'first\r\n\nsecond\nthi')
+        self.assertEqual(pop_lines(buf), [b'first\r', b'', b'second'])
+        self.assertEqual(buf, b'thi')
+        self.assertEqual(pop_lines(buf), [])
+        self.assertEqual(buf, b'thi')
+        buf += b'rd\n'
+        self.assertEqual(pop_lines(buf), [b'third'])
+        self.assertEqual(buf, b'')
+
+
+class LogMessageClassifierTestCase(TestCase):
+    """Test the log message classifier."""
+
+    def test_builtin(self):
+        """Built-in patterns classify both strings and raw lines."""
+        classifier = LogMessageClassifier()
+        for line in ('warning: a', b'warning: a'):
+            self.assertEqual(classifier.classify(line), logging.WARNING)
+        for line in ('ERROR x warning: y', b'ERROR x warning: y'):
+            self.assertEqual(classifier.classify(line), logging.ERROR)
+        self.assertEqual(classifier.classify(b'none', logging.DEBUG),
+                         logging.DEBUG)
+
+    def test_unicode(self):
+        """Custom patterns keep their Unicode semantics on raw lines."""
+        classifier = LogMessageClassifier({'warning': [r'caf\u00e9',
+                                                       r'^\w+!$']})
+        for line in ('café', 'écrit!'):
+            self.assertEqual(classifier.classify(line), logging.WARNING)
+            self.assertEqual(classifier.classify(line.encode()),
+                             logging.WARNING)
+        self.assertEqual(classifier.classify(b'cafe', logging.INFO),
+                         logging.INFO)
+
+
+class FlushCounter:
+    """Fake result file, which only counts its flushes."""
+
+    def __init__(self):
+        self.flushes = 0
+
+    def write(self, data: str) -> int:
+        """Discard written data."""
+        return len(data)
+
+    def flush(self) -> None:
+        """Count flush requests."""
+        self.flushes += 1
+
+
+class ResultWriterTestCase(TestCase):
+    """Test the result file writer."""
+
+    def test_batch(self):
+        """Rows are committed by batch."""
+        cfp = FlushCounter()
+        writer = ResultWriter(cfp)
+        for pos in range(ResultWriter.FLUSH_ROWS):
+            writer.writerow((pos,))
+        self.assertEqual(cfp.flushes, 1)
+        writer.close()
+        self.assertEqual(cfp.flushes, 1)
+
+    @patch.object(ResultWriter, 'FLUSH_DELAY', 0.05)
+    def test_delay(self):
+        """A pending row is committed even if no other row follows."""
+        cfp = FlushCounter()
+        writer = ResultWriter(cfp)
+        writer.writerow(('a',))
+        writer.writerow(('b',))
+        self.assertEqual(cfp.flushes, 0)
+        # wait for the flush timer, with a generous limit for loaded hosts
+        timeout = now() + 10.0
+        while not cfp.flushes and now() < timeout:
+            sleep(0.01)
+        self.assertEqual(cfp.flushes, 1)
+        writer.close()
+        self.assertEqual(cfp.flushes, 1)
+
+    def test_close(self):
+        """Pending rows are committed on close."""
+        cfp = FlushCounter()
+        writer = ResultWriter(cfp)
+        writer.writerow(('a',))
+        writer.close()
+        self.assertEqual(cfp.flushes, 1)
+
+
+if __name__ == '__main__':
+    main()